@@ -1,125 +1,57 @@
 import streamlit as st
 import pandas as pd
-import os
-from datetime import datetime
 import textwrap
-import numpy as np
+import io
+import os
+from contextlib import contextmanager
+from functools import partial, wraps
+from meliawards.armazenamento import criar_armazenamento
+from meliawards.coordenacao import criar_coordenador
+from meliawards.acessos import (
+    carregar_indice_acessos, checar_usuario, fornecedores_para_categoria, get_opcoes_categorias, get_opcoes_tipo
+)
+from meliawards.agregacao import resumir_agregados
+from meliawards.exportacao import escrever_csv, escrever_xlsx
+from meliawards.instrumentacao import exportar_desempenho_json, iniciar_execucao, limpar_desempenho, resumo_desempenho
+from meliawards.pontuacao import ler_perguntas, rotulo_tipo
+from meliawards.ranking import configuracao_ranking
+from meliawards.referencias import carregar_referencia, invalidar_referencias
+from meliawards.respostas import obter_respostas_avaliador, salvar_resposta_ponderada, salvar_respostas_lote
 
-PERGUNTA_ARQUIVO = "Perguntas.xlsx"
-ACESSOS_ARQUIVO = "Acessos.xlsx"
-RESPOSTA_ARQUIVO = "Respostas.xlsx"
+# Caminhos podem ser trocados por variáveis de ambiente (ex.: fixtures do teste de carga)
+PERGUNTA_ARQUIVO = os.environ.get("MELIAWARDS_PERGUNTAS", "Perguntas.xlsx")
+ACESSOS_ARQUIVO = os.environ.get("MELIAWARDS_ACESSOS", "Acessos.xlsx")
+RESPOSTA_ARQUIVO = os.environ.get("MELIAWARDS_RESPOSTAS", "Respostas.xlsx")
+RESPOSTA_BANCO = os.environ.get("MELIAWARDS_BANCO", "Respostas.db")
+TAMANHO_PAGINA = 50
+MODO_INDIVIDUAL = "Um fornecedor por vez"
+MODO_LOTE = "Todos os fornecedores (grade)"
 ADMIN_PASSWORD = "admin123"   # Necessário alterar depois by: Bruno Jeliel
 
-def ler_perguntas(path):
-    df = pd.read_excel(path, header=0)
-    perguntas = {}
-    tipos_avaliacao = {'Comercial': [], 'Técnica': [], 'ESG': []}
-    for tipo in tipos_avaliacao.keys():
-        cols_questao = [c for c in df.columns if tipo.lower() in str(c).lower() and "peso" not in str(c).lower()]
-        cols_peso = [c for c in df.columns if tipo.lower() in str(c).lower() and "peso" in str(c).lower()]
-        cols_questao.sort(); cols_peso.sort()
-        for col_q, col_p in zip(cols_questao, cols_peso):
-            for idx in range(len(df)):
-                q = df.at[idx, col_q]
-                p = df.at[idx, col_p]
-                if pd.notnull(q) and pd.notnull(p) and str(q).strip() != "":
-                    tipos_avaliacao[tipo].append((str(q).strip(), float(p)))
-        perguntas[tipo] = tipos_avaliacao[tipo]
-    return perguntas
-
-def carregar_acessos(path):
-    acessos = pd.read_excel(path, sheet_name='Acessos')
-    categorias = pd.read_excel(path, sheet_name='Categorias')
-    return acessos, categorias
-
-def checar_usuario(email, tipo, categoria, acessos):
-    filtro = (
-        (acessos.iloc[:, 0].str.lower() == email.lower()) &
-        (acessos.iloc[:, 1].str.lower() == tipo.lower()) &
-        (acessos.iloc[:, 2] == categoria)
-    )
-    return not acessos[filtro].empty
-
-def get_opcoes_tipo(email, acessos):
-    return acessos[acessos.iloc[:,0].str.lower() == email.lower()].iloc[:,1].dropna().unique().tolist()
-
-def get_opcoes_categorias(email, tipo, acessos):
-    return acessos[
-        (acessos.iloc[:,0].str.lower() == email.lower()) &
-        (acessos.iloc[:,1].str.lower() == tipo.lower())
-    ].iloc[:,2].dropna().unique().tolist()
-
-def fornecedores_para_categoria(categoria, categorias):
-    fornecedores = categorias[categorias.iloc[:,0] == categoria].iloc[:,1].dropna().tolist()
-    return fornecedores
+# Na primeira execução importa o histórico já existente no Respostas.xlsx
+armazenamento = criar_armazenamento(RESPOSTA_BANCO, legado=RESPOSTA_ARQUIVO)
+# Envios de todas as sessões passam pelo coordenador (fila + commits agrupados + lock entre réplicas)
+coordenador = criar_coordenador(armazenamento)
 
-def obter_df_resposta(aba):
-    if os.path.exists(RESPOSTA_ARQUIVO):
-        xls = pd.ExcelFile(RESPOSTA_ARQUIVO)
-        if aba in xls.sheet_names:
-            return pd.read_excel(RESPOSTA_ARQUIVO, sheet_name=aba)
-    return pd.DataFrame()
-
-def obter_todas_respostas():
-    abas = ['Comercial', 'Técnica', 'ESG']
-    frames = []
-    for aba in abas:
-        df = obter_df_resposta(aba)
-        if not df.empty:
-            df['Tipo'] = aba
-            frames.append(df)
-    if frames:
-        return pd.concat(frames, ignore_index=True)
-    else:
-        return pd.DataFrame()
+# Respostas.xlsx deixou de ser o destino das gravações; é gerado sob demanda
+def gerar_excel_respostas():
+    buffer = io.BytesIO()
+    armazenamento.exportar_excel(buffer, legado=RESPOSTA_ARQUIVO)
+    return buffer.getvalue()
 
-def salvar_resposta_ponderada(tipo, email, categoria, fornecedor, respostas, perguntas):
-    hoje = datetime.now()
-    data_str = hoje.strftime("%d/%m/%Y")
-    hora_str = hoje.strftime("%H:%M:%S")
-    aba = tipo.capitalize()
-    df = obter_df_resposta(aba)
-    colunas_fixas = ["Data", "Hora", "E-mail", "Categoria", "Fornecedor"]
-    colunas_perguntas = [q for (q, p) in perguntas]
-    colunas_ponderada = [q + " (PONDERADA)" for (q, p) in perguntas]
-    todas_colunas = colunas_fixas + colunas_perguntas + colunas_ponderada
-    notas_puras = []
-    notas_ponderadas = []
-    for (pergunta, peso) in perguntas:
-        nota = respostas[pergunta]
-        notas_puras.append(nota)
-        ponderada = nota * peso
-        notas_ponderadas.append(ponderada)
-    nova_linha = [data_str, hora_str, email, categoria, fornecedor] + notas_puras + notas_ponderadas
-    nova_df = pd.DataFrame([nova_linha], columns=todas_colunas)
-    if not df.empty:
-        for col in todas_colunas:
-            if col not in df.columns:
-                df[col] = ""
-        for col in df.columns:
-            if col not in todas_colunas:
-                nova_df[col] = ""
-        mask = (df['E-mail'].str.lower() == email.lower()) & \
-               (df['Categoria'] == categoria) & \
-               (df['Fornecedor'] == fornecedor)
-        df = df[~mask]
-        df = pd.concat([df, nova_df], ignore_index=True)
-        df = df[todas_colunas]
-    else:
-        df = nova_df
-    return aba, df
+# Exportações geradas só quando o botão é clicado (o Streamlit entrega o
+# arquivo inteiro em bytes; as linhas vêm do banco em blocos)
+def gerar_csv_respostas(filtros):
+    arquivo = io.BytesIO()
+    colunas, linhas = armazenamento.linhas_respostas(filtros)
+    escrever_csv(arquivo, colunas, linhas)
+    return arquivo.getvalue()
 
-def salvar_excel(tabela: dict):
-    if os.path.exists(RESPOSTA_ARQUIVO):
-        xls = pd.ExcelFile(RESPOSTA_ARQUIVO)
-        abas_existentes = {s: pd.read_excel(RESPOSTA_ARQUIVO, sheet_name=s) for s in xls.sheet_names if s not in tabela}
-    else:
-        abas_existentes = {}
-    with pd.ExcelWriter(RESPOSTA_ARQUIVO, engine="openpyxl", mode='w') as writer:
-        for aba, df in tabela.items():
-            df.to_excel(writer, sheet_name=aba, index=False)
-        for aba, df in abas_existentes.items():
-            df.to_excel(writer, sheet_name=aba, index=False)
+def gerar_scorecard_consolidado():
+    arquivo = io.BytesIO()
+    colunas, linhas = armazenamento.linhas_scorecard()
+    escrever_xlsx(arquivo, "Notas Ponderadas + Média", colunas, linhas)
+    return arquivo.getvalue()
 
 def wrap_col_names(df, width=25):
     df = df.copy()
@@ -128,6 +60,41 @@ def wrap_col_names(df, width=25):
 
 st.set_page_config("Scorecard de Fornecedores", layout="wide", initial_sidebar_state="expanded")
 
+# Instrumentação: tempo de cada fase desta execução do script, por página
+# (a página é confirmada depois da navegação da sidebar)
+execucao = iniciar_execucao(st.session_state.get("pagina", "login"), st.session_state.get("_execucao"))
+st.session_state["_execucao"] = execucao
+
+# ======================================
+# Fragmentos: cada seção interativa (avaliação, prévia das notas, tabelas do
+# admin) reexecuta sozinha quando seus widgets mudam, com os argumentos da
+# última execução completa. CSS, logo, planilhas e sidebar não rodam de novo.
+# ======================================
+@contextmanager
+def execucao_fragmento():
+    atual = st.session_state.get("_execucao")
+    if atual is not None and not atual.fragmento and not atual.finalizada:
+        # Dentro da execução completa do script
+        yield atual
+        return
+    medicao = iniciar_execucao(f"{st.session_state.get('pagina', 'login')} (fragmento)", atual, fragmento=True)
+    st.session_state["_execucao"] = medicao
+    completa = False
+    try:
+        yield medicao
+        completa = True
+    finally:
+        # Exceção ou st.rerun(scope="fragment"): conta só até a última fase medida
+        medicao.finalizar(completa=completa)
+
+def fragmento(funcao):
+    @st.fragment
+    @wraps(funcao)
+    def executar(*args, **kwargs):
+        with execucao_fragmento() as medicao:
+            return funcao(medicao, *args, **kwargs)
+    return executar
+
 # ======================================
 # CSS: Modo escuro total e campos custom dark By: Bruno Jeliel
 # ======================================
@@ -193,13 +160,16 @@ st.markdown(""" <h1 style='text-align: center; color: white; font-family: Montse
     """, unsafe_allow_html=True)
 st.markdown("<h1 style='text-align: center; color: #FFD700;font-family: Montserrat, Arial, sans-serif;'>Programa - Meli Awards<br></h1>", unsafe_allow_html=True)
 
-perguntas_ref = ler_perguntas(PERGUNTA_ARQUIVO)
-acessos, categorias_df = carregar_acessos(ACESSOS_ARQUIVO)
+# Planilhas de referência só são relidas quando o arquivo muda (cache entre sessões)
+with execucao.medir("carregamento"):
+    perguntas_ref = carregar_referencia(PERGUNTA_ARQUIVO, ler_perguntas)
+    acessos = carregar_referencia(ACESSOS_ARQUIVO, carregar_indice_acessos)
+    # Pesos alterados no Perguntas.xlsx viram nova versão do questionário e repondera o histórico
+    armazenamento.registrar_questionario(perguntas_ref)
+    armazenamento.configurar_ranking(configuracao_ranking(perguntas_ref))
 
 if "email_logado" not in st.session_state:
     st.session_state.email_logado = ""
-if "fornecedores_responsaveis" not in st.session_state:
-    st.session_state.fornecedores_responsaveis = {}
 if "pagina" not in st.session_state:
     st.session_state.pagina = "login"
 if "admin_mode" not in st.session_state:
@@ -231,6 +201,7 @@ with st.sidebar:
         if st.button("Sair"):
             st.session_state.clear()
             st.rerun()
+execucao.pagina = st.session_state.pagina
 
 # LOGIN
 if st.session_state.pagina == "login":
@@ -251,84 +222,186 @@ if st.session_state.pagina == "login":
             else:
                 st.error("Senha de administrador incorreta!")
         else:
-            tipos = get_opcoes_tipo(email, acessos)
+            with execucao.medir("permissoes"):
+                tipos = get_opcoes_tipo(email, acessos)
             if not tipos:
                 st.error("E-mail sem permissão cadastrada.")
                 st.stop()
             st.session_state.email_logado = email
-            st.session_state.fornecedores_responsaveis = {}
             st.session_state.pagina = "Avaliar Fornecedores"
             st.session_state.admin_mode = False
             st.rerun()
 
 # Painel admin
+@fragmento
+def fragmento_ranking(execucao, categorias_ranking):
+    col_rank1, col_rank2 = st.columns([3,1])
+    categoria_ranking = col_rank1.selectbox("Categoria", categorias_ranking, key="categoria_ranking")
+    top_k = col_rank2.number_input("Top", min_value=1, max_value=100, value=10, step=1)
+    with execucao.medir("agregacao"):
+        df_ranking = armazenamento.ranking(categoria_ranking, int(top_k))
+    df_ranking.insert(0, "Posição", range(1, len(df_ranking) + 1))
+    df_ranking["Nota Final"] = (df_ranking["Nota Final"] * 100).round(2)
+    st.dataframe(df_ranking.rename(columns={"Nota Final": "Nota Final (%)"}), use_container_width=True, hide_index=True)
+
+@fragmento
+def fragmento_avaliacoes(execucao, agregados):
+    col_f1, col_f2, col_f3, col_f4 = st.columns(4)
+    filtro_tipo = col_f1.selectbox("Tipo", ["Todos"] + sorted(agregados["Tipo"].unique()), key="filtro_tipo")
+    filtro_categoria = col_f2.selectbox("Categoria", ["Todas"] + sorted(agregados["Categoria"].unique()), key="filtro_categoria")
+    fornecedores_filtro = agregados if filtro_categoria == "Todas" else agregados[agregados["Categoria"] == filtro_categoria]
+    filtro_fornecedor = col_f3.selectbox("Fornecedor", ["Todos"] + sorted(fornecedores_filtro["Fornecedor"].unique()), key="filtro_fornecedor")
+    filtro_email = col_f4.text_input("E-mail contém", key="filtro_email").strip()
+    filtros = {
+        "aba": None if filtro_tipo == "Todos" else filtro_tipo.capitalize(),
+        "categoria": None if filtro_categoria == "Todas" else filtro_categoria,
+        "fornecedor": None if filtro_fornecedor == "Todos" else filtro_fornecedor,
+        "email": filtro_email or None,
+    }
+    # Só a página pedida é lida do banco
+    with execucao.medir("consulta_respostas"):
+        total_filtrado = armazenamento.contar(filtros)
+    total_paginas = max(1, -(-total_filtrado // TAMANHO_PAGINA))
+    pagina_atual = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1, key="pagina_respostas")
+    inicio = (int(pagina_atual) - 1) * TAMANHO_PAGINA
+    with execucao.medir("consulta_respostas"):
+        df_pagina = armazenamento.pagina(filtros, TAMANHO_PAGINA, inicio)
+    st.dataframe(df_pagina, use_container_width=True, hide_index=True)
+    st.caption(f"Mostrando {min(inicio + 1, total_filtrado)}-{min(inicio + TAMANHO_PAGINA, total_filtrado)} de {total_filtrado} avaliações (página {int(pagina_atual)} de {total_paginas})")
+    st.download_button('Baixar avaliações filtradas (CSV)', partial(gerar_csv_respostas, filtros), file_name='todas_avaliacoes.csv', mime='text/csv')
+    st.download_button('Baixar Scorecard consolidado (XLSX)', gerar_scorecard_consolidado, file_name='Scorecard-Consolidado.xlsx', mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    st.download_button('Exportar Respostas.xlsx', gerar_excel_respostas, file_name=os.path.basename(RESPOSTA_ARQUIVO), mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+@fragmento
+def fragmento_diagnostico(execucao):
+    st.caption("Tempo de cada fase por execução da página (últimas execuções de todas as sessões deste servidor).")
+    desempenho = resumo_desempenho()
+    if desempenho:
+        st.dataframe(pd.DataFrame(desempenho), use_container_width=True, hide_index=True)
+    else:
+        st.info("Ainda não há medições.")
+    gravacoes = coordenador.estatisticas()
+    st.caption(f"Gravações: {gravacoes['envios']} envios em {gravacoes['commits']} commits (maior lote: {gravacoes['maior_lote']}, erros: {gravacoes['erros']}, na fila: {gravacoes['fila']}).")
+    col_diag1, col_diag2 = st.columns([1,1])
+    col_diag1.download_button('Baixar diagnóstico (JSON)', exportar_desempenho_json, file_name='diagnostico_desempenho.json', mime='application/json')
+    if col_diag2.button("Limpar medições"):
+        limpar_desempenho()
+        st.rerun(scope="fragment")
+
 if st.session_state.pagina == "admin":
     st.title("Painel Administrador")
-    df_respostas = obter_todas_respostas()
-    if df_respostas.empty:
+    if st.button("Recarregar Perguntas e Acessos"):
+        invalidar_referencias()
+        st.rerun()
+    # Agregados mantidos a cada envio: não dependem do volume de respostas
+    with execucao.medir("agregacao"):
+        agregados = armazenamento.agregados()
+    if agregados.empty:
         st.warning("Nenhuma avaliação registrada ainda.")
     else:
-        st.info(f"Total de avaliações registradas: **{len(df_respostas)}**")
-        tipo_data = df_respostas.groupby("Tipo").agg({"E-mail": "count"}).rename(columns={"E-mail": "Qtd. Avaliações"})
+        agregados["Tipo"] = agregados["Aba"].map(rotulo_tipo)
+        st.info(f"Total de avaliações registradas: **{int(agregados['Qtd'].sum())}**")
+        tipo_data = resumir_agregados(agregados, "Tipo")[["Qtd. Avaliações"]]
         st.bar_chart(tipo_data)
-        fornecedor_data = df_respostas.groupby("Fornecedor").agg({"E-mail": "count"}).rename(columns={"E-mail": "Qtd. Avaliações"}).sort_values("Qtd. Avaliações", ascending=False)
+        resumo_fornecedor = resumir_agregados(agregados, "Fornecedor").sort_values("Qtd. Avaliações", ascending=False)
+        fornecedor_data = resumo_fornecedor[["Qtd. Avaliações"]]
         st.subheader("Avaliações por Fornecedor")
         st.bar_chart(fornecedor_data)
-        ponderadas_cols = [col for col in df_respostas.columns if "PONDERADA" in col]
-        medias_ponderadas = {}
-        for forn in fornecedor_data.index:
-            df_forn = df_respostas[df_respostas["Fornecedor"] == forn]
-            vals = []
-            for idx, row in df_forn.iterrows():
-                total_pond = sum([row[col] for col in ponderadas_cols if col in row and pd.notnull(row[col])])
-                vals.append(total_pond)
-            if vals:
-                medias_ponderadas[forn] = np.mean(vals)
-        if medias_ponderadas:
+        medias_ponderadas = resumo_fornecedor["Média Ponderada"].dropna()
+        if not medias_ponderadas.empty:
             st.subheader("Média das Notas Ponderadas por Fornecedor")
-            st.bar_chart(pd.DataFrame(medias_ponderadas.values(), index=medias_ponderadas.keys(), columns=["Média Ponderada"]))
+            st.bar_chart(medias_ponderadas.to_frame("Média Ponderada"))
+        st.subheader("Média das Notas Ponderadas por Categoria e Tipo")
+        st.dataframe(resumir_agregados(agregados, ["Categoria", "Tipo"]), use_container_width=True)
+        st.subheader("Ranking Meli Awards")
+        with execucao.medir("agregacao"):
+            categorias_ranking = armazenamento.categorias_ranking()
+        if categorias_ranking:
+            fragmento_ranking(categorias_ranking)
         st.subheader("Todas as Avaliações")
-        st.dataframe(df_respostas, use_container_width=True, hide_index=True)
-        st.download_button('Baixar todas as avaliações (CSV)', df_respostas.to_csv(index=False).encode('utf-8'), file_name='todas_avaliacoes.csv', mime='text/csv')
+        fragmento_avaliacoes(agregados)
+    with st.expander("Diagnóstico de desempenho"):
+        fragmento_diagnostico()
 
 # Avaliação
-if st.session_state.email_logado != "" and st.session_state.pagina == "Avaliar Fornecedores":
-    tipos = get_opcoes_tipo(st.session_state.email_logado, acessos)
+@fragmento
+def fragmento_avaliacao(execucao, email, perguntas_ref, acessos):
+    with execucao.medir("permissoes"):
+        tipos = get_opcoes_tipo(email, acessos)
     tipo = st.selectbox("Tipo de avaliação", tipos, key="tipo")
-    categorias = get_opcoes_categorias(st.session_state.email_logado, tipo, acessos)
+    with execucao.medir("permissoes"):
+        categorias = get_opcoes_categorias(email, tipo, acessos)
     if len(categorias) == 0:
         st.warning("Nenhuma categoria para este tipo.")
-        st.stop()
+        return
     categoria = st.selectbox("Categoria", categorias, key="cat")
-    fornecedores = fornecedores_para_categoria(categoria, categorias_df)
-    fornecedores_responsaveis = st.session_state.fornecedores_responsaveis.get(tipo, [])
+    with execucao.medir("permissoes"):
+        fornecedores = fornecedores_para_categoria(categoria, acessos)
+    # Respondidos vêm do armazenamento: valem entre sessões e após reinícios
+    with execucao.medir("checagem_duplicidade"):
+        fornecedores_responsaveis = armazenamento.fornecedores_respondidos(tipo.capitalize(), email, categoria)
     for f in fornecedores:
         if f in fornecedores_responsaveis:
             st.markdown(f"<span style='color: green;'>{f}</span>", unsafe_allow_html=True)
         else:
             st.write(f"{f}")
-    if len(fornecedores) > 0:
+    if len(fornecedores) == 0:
+        return
+    with execucao.medir("permissoes"):
+        acesso_ok = checar_usuario(email, tipo, categoria, acessos)
+    if not acesso_ok:
+        st.error("Acesso negado! Verifique seu e-mail, categoria e tipo de avaliação.")
+        return
+    perguntas = perguntas_ref.get(tipo.capitalize()) or perguntas_ref.get(tipo)
+    modo = st.radio("Modo de avaliação", [MODO_INDIVIDUAL, MODO_LOTE], horizontal=True, key="modo")
+    if modo == MODO_LOTE:
+        st.markdown("---")
+        st.header(f"Avaliação {tipo} em lote ({categoria})")
+        pendentes = [f for f in fornecedores if f not in fornecedores_responsaveis]
+        if perguntas and not pendentes:
+            st.info("Você já avaliou todos os fornecedores desta categoria para este tipo de avaliação.")
+        elif perguntas:
+            st.markdown("""
+                <div style="font-size: 13px;">
+                    <span style="color:#999"><b>1</b> = Ruim &nbsp;&nbsp;&nbsp; <b>2</b> = Regular &nbsp;&nbsp;&nbsp; <b>3</b> = Bom</span>
+                </div>""", unsafe_allow_html=True)
+            for idx, (pergunta, peso) in enumerate(perguntas, 1):
+                st.markdown(f"<b>Q{idx}.</b> {pergunta} (Peso {peso})", unsafe_allow_html=True)
+            colunas_grade = [f"Q{idx}" for idx in range(1, len(perguntas) + 1)]
+            grade = pd.DataFrame(2, index=pd.Index(pendentes, name="Fornecedor"), columns=colunas_grade)
+            with st.form("avaliacao_lote"):
+                grade_editada = st.data_editor(
+                    grade,
+                    use_container_width=True,
+                    num_rows="fixed",
+                    column_config={
+                        col: st.column_config.NumberColumn(col, help=pergunta, min_value=1, max_value=3, step=1, required=True)
+                        for col, (pergunta, _) in zip(colunas_grade, perguntas)
+                    },
+                    key=f"grade_{tipo}_{categoria}",
+                )
+                submitted_lote = st.form_submit_button("Enviar avaliações")
+            if submitted_lote:
+                try:
+                    with execucao.medir("persistencia"):
+                        salvos = salvar_respostas_lote(
+                            coordenador, tipo, email, categoria, pendentes, grade_editada.to_numpy(), perguntas
+                        )
+                except (ValueError, TimeoutError) as erro:
+                    st.error(str(erro))
+                else:
+                    st.success(f"{len(salvos)} avaliações registradas com sucesso!")
+    else:
         fornecedor_selecionado = st.selectbox("Selecionar Fornecedor", fornecedores, key="forn")
-        if not checar_usuario(st.session_state.email_logado, tipo, categoria, acessos):
-            st.error("Acesso negado! Verifique seu e-mail, categoria e tipo de avaliação.")
-            st.stop()
         st.markdown("---")
         st.header(f"Avaliação {tipo} para {fornecedor_selecionado} ({categoria})")
         st.markdown("""
             <div style="font-size: 13px;">
                 <span style="color:#999"><b>1</b> = Ruim &nbsp;&nbsp;&nbsp; <b>2</b> = Regular &nbsp;&nbsp;&nbsp; <b>3</b> = Bom</span>
             </div>""", unsafe_allow_html=True)
-        perguntas = perguntas_ref.get(tipo.capitalize()) or perguntas_ref.get(tipo)
         if perguntas:
-            df_respostas = obter_df_resposta(tipo.capitalize())
-            ja_respondeu = False
-            if not df_respostas.empty:
-                mask = (
-                    (df_respostas['E-mail'].str.lower() == st.session_state.email_logado.lower()) &
-                    (df_respostas['Categoria'] == categoria) &
-                    (df_respostas['Fornecedor'] == fornecedor_selecionado)
-                )
-                ja_respondeu = df_respostas[mask].shape[0] > 0
+            with execucao.medir("checagem_duplicidade"):
+                ja_respondeu = armazenamento.ja_respondeu(tipo.capitalize(), email, categoria, fornecedor_selecionado)
             if ja_respondeu:
                 st.info("Você já respondeu esta avaliação para essa combinação de tipo, categoria e fornecedor. Só é permitido um envio por usuário.")
             else:
@@ -346,49 +419,51 @@ if st.session_state.email_logado != "" and st.session_state.pagina == "Avaliar F
                         )
                     submitted = st.form_submit_button("Enviar avaliação")
                     if submitted:
-                        notas_lista = [notas[q] for (q, p) in perguntas]
-                        ponderadas_lista = [notas[q] * p for (q, p) in perguntas]
-                        aba, df_atualizada = salvar_resposta_ponderada(
-                            tipo, st.session_state.email_logado, categoria, fornecedor_selecionado, notas, perguntas
-                        )
-                        st.session_state.fornecedores_responsaveis.setdefault(tipo, []).append(fornecedor_selecionado)
-                        salvar_excel({aba: df_atualizada})
-                        st.success("Avaliação registrada com sucesso!")
+                        try:
+                            with execucao.medir("persistencia"):
+                                salvar_resposta_ponderada(
+                                    coordenador, tipo, email, categoria, fornecedor_selecionado, notas, perguntas
+                                )
+                        except TimeoutError as erro:
+                            st.error(str(erro))
+                        else:
+                            st.success("Avaliação registrada com sucesso!")
+
+if st.session_state.email_logado != "" and st.session_state.pagina == "Avaliar Fornecedores":
+    fragmento_avaliacao(st.session_state.email_logado, perguntas_ref, acessos)
 
 # Prévia das Notas
-if st.session_state.email_logado != "" and st.session_state.pagina == "Resumo Final":
-    st.subheader("Resumo Final das Suas Avaliações")
-    email = st.session_state.email_logado
-    tipos = get_opcoes_tipo(email, acessos)
+@fragmento
+def fragmento_resumo(execucao, email, perguntas_ref, acessos):
+    with execucao.medir("permissoes"):
+        tipos = get_opcoes_tipo(email, acessos)
+    # Só os envios deste avaliador, com o total ponderado já calculado no armazenamento
+    with execucao.medir("consulta_respostas"):
+        proprias = obter_respostas_avaliador(armazenamento, email)
+    por_aba = {}
+    for resposta in proprias:
+        por_aba.setdefault(resposta["Aba"], []).append(resposta)
     mostrou_nota = False
     for tipo_avaliacao in tipos:
         perguntas_tipo = perguntas_ref.get(tipo_avaliacao.capitalize()) or perguntas_ref.get(tipo_avaliacao)
         if not perguntas_tipo:
             continue
-        df_tipo = obter_df_resposta(tipo_avaliacao.capitalize())
-        if df_tipo.empty or "E-mail" not in df_tipo.columns:
-            continue
-        mask_email = (df_tipo['E-mail'].str.lower() == email.lower())
-        respostas_email = df_tipo[mask_email]
-        if respostas_email.empty:
-            continue
-        mostrou_nota = True
-        for idx, linha in respostas_email.iterrows():
-            categoria_ = linha['Categoria']
-            fornecedor_ = linha['Fornecedor']
-            st.markdown(f"**[{tipo_avaliacao}] | {categoria_} | {fornecedor_}**")
-            colunas_ponderadas = [q + " (PONDERADA)" for (q, _) in perguntas_tipo if (q + " (PONDERADA)") in linha]
-            notas_ponderadas = [(q, linha[q + " (PONDERADA)"] if (q + " (PONDERADA)") in linha else None) for (q, _) in perguntas_tipo]
-            soma_ponderada = sum([val for (q, val) in notas_ponderadas if pd.notnull(val)])
+        for resposta in por_aba.get(tipo_avaliacao.capitalize(), []):
+            mostrou_nota = True
+            st.markdown(f"**[{tipo_avaliacao}] | {resposta['Categoria']} | {resposta['Fornecedor']}**")
             df_show = pd.DataFrame({
                 "Questão": [q for (q, _) in perguntas_tipo],
-                "Nota Ponderada": [linha[q + " (PONDERADA)"] if (q + " (PONDERADA)") in linha else None for (q, _) in perguntas_tipo]
+                "Nota Ponderada": [resposta["ponderadas"].get(q) for (q, _) in perguntas_tipo]
             })
             st.dataframe(df_show, use_container_width=True, hide_index=True)
-            st.markdown(f"**Resultado Final (Soma das Notas Ponderadas):** `{soma_ponderada:.2f}`")
+            st.markdown(f"**Resultado Final (Soma das Notas Ponderadas):** `{resposta['Total']:.2f}`")
             st.markdown("---")
     if not mostrou_nota:
         st.info("Você ainda não realizou nenhuma avaliação.")
+
+if st.session_state.email_logado != "" and st.session_state.pagina == "Resumo Final":
+    st.subheader("Resumo Final das Suas Avaliações")
+    fragmento_resumo(st.session_state.email_logado, perguntas_ref, acessos)
     col1, col2 = st.columns([1,1])
     with col1:
         if st.button("Voltar para Avaliação"):
@@ -433,4 +508,6 @@ if st.session_state.pagina == "Final":
     )
     if st.form("sairfake").form_submit_button("sairfake", type="primary"):
         st.session_state.clear()
-        st.rerun()
\ No newline at end of file
+        st.rerun()
+
+execucao.finalizar()
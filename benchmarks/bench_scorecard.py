@@ -0,0 +1,171 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.gerar_dados import gerar_planilhas
+from meliawards.acessos import (
+    IndiceAcessos, carregar_acessos, checar_usuario, fornecedores_para_categoria, get_opcoes_categorias, get_opcoes_tipo
+)
+from meliawards.agregacao import resumir_agregados
+from meliawards.armazenamento import criar_armazenamento
+from meliawards.pontuacao import ler_perguntas
+from meliawards.referencias import carregar_referencia, invalidar_referencias
+from meliawards.respostas import (
+    importar_respostas, obter_respostas_avaliador, salvar_resposta_ponderada
+)
+
+# ======================================
+# Benchmarks dos caminhos quentes do Scorecard sobre dados sintéticos
+#   python -m benchmarks.bench_scorecard --tamanhos pequeno,medio --saida bench.json
+# ======================================
+TAMANHOS = {
+    # avaliadores (N), categorias (M), fornecedores por categoria (K), perguntas por tipo (Q)
+    "pequeno": {"avaliadores": 60, "categorias": 5, "fornecedores": 8, "perguntas": 6},
+    "medio": {"avaliadores": 600, "categorias": 20, "fornecedores": 15, "perguntas": 6},
+    "grande": {"avaliadores": 6000, "categorias": 60, "fornecedores": 25, "perguntas": 8},
+}
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "repeticoes": repeticoes,
+        "min_ms": round(tempos[0], 4),
+        "mediana_ms": round(statistics.median(tempos), 4),
+        "media_ms": round(statistics.fmean(tempos), 4),
+        "p95_ms": round(tempos[min(len(tempos) - 1, int(0.95 * len(tempos)))], 4),
+    }
+
+
+def medir_tamanho(nome, parametros, repeticoes, pasta_base):
+    pasta = tempfile.mkdtemp(prefix=f"bench_{nome}_", dir=pasta_base)
+    respostas = gerar_planilhas(pasta, **parametros)
+    perguntas_path = os.path.join(pasta, "Perguntas.xlsx")
+    acessos_path = os.path.join(pasta, "Acessos.xlsx")
+    perguntas_ref = ler_perguntas(perguntas_path)
+    acessos_df, categorias_df = carregar_acessos(acessos_path)
+    indice = IndiceAcessos(acessos_df, categorias_df)
+    armazenamento = criar_armazenamento(os.path.join(pasta, "Respostas.db"))
+    importar_respostas(armazenamento, respostas, perguntas_ref)
+
+    rng = np.random.default_rng(1)
+    amostra = acessos_df.iloc[rng.integers(0, len(acessos_df), size=200)]
+    consultas = list(zip(amostra["E-mail"], amostra["Avaliação"], amostra["Categoria"]))
+
+    def permissoes():
+        for email, tipo, categoria in consultas:
+            get_opcoes_tipo(email, indice)
+            get_opcoes_categorias(email, tipo, indice)
+            checar_usuario(email, tipo, categoria, indice)
+            fornecedores_para_categoria(categoria, indice)
+
+    novos = itertools.count()
+    perguntas_comercial = perguntas_ref["Comercial"]
+    categoria_envio = categorias_df.iloc[0, 0]
+    fornecedor_envio = categorias_df.iloc[0, 1]
+
+    def envio():
+        # Avaliador novo a cada envio: sempre uma inserção, nunca substituição
+        salvar_resposta_ponderada(
+            armazenamento, "Comercial", f"novo{next(novos)}@exemplo.com", categoria_envio, fornecedor_envio,
+            {q: 2 for (q, _) in perguntas_comercial}, perguntas_comercial,
+        )
+
+    def ja_respondeu():
+        for email, tipo, categoria in consultas:
+            armazenamento.ja_respondeu(tipo.capitalize(), email, categoria, fornecedor_envio)
+
+    def previa_notas():
+        for email, _, _ in consultas:
+            obter_respostas_avaliador(armazenamento, email)
+
+    def agregacao_admin():
+        agregados = armazenamento.agregados()
+        resumir_agregados(agregados, "Aba")
+        resumir_agregados(agregados, "Fornecedor")
+        resumir_agregados(agregados, ["Categoria", "Aba"])
+
+    def referencia_cache():
+        carregar_referencia(acessos_path, carregar_acessos, sidecar=False)
+
+    # Primeira leitura fora da medição: o nome promete cache quente
+    referencia_cache()
+    medicoes = {
+        "ler_perguntas": cronometrar(lambda: ler_perguntas(perguntas_path), repeticoes),
+        "carregar_acessos": cronometrar(lambda: carregar_acessos(acessos_path), repeticoes),
+        "carregar_referencia_cache_quente": cronometrar(referencia_cache, repeticoes),
+        "indice_acessos_construcao": cronometrar(lambda: IndiceAcessos(acessos_df, categorias_df), repeticoes),
+        "permissoes_200_consultas": cronometrar(permissoes, repeticoes),
+        "ja_respondeu_200_consultas": cronometrar(ja_respondeu, repeticoes),
+        "salvar_resposta_ponderada": cronometrar(envio, max(repeticoes, 20)),
+        "previa_notas_200_avaliadores": cronometrar(previa_notas, repeticoes),
+        "agregacao_admin": cronometrar(agregacao_admin, repeticoes),
+        "reconstruir_agregados_sql": cronometrar(armazenamento.reconstruir_agregados, repeticoes),
+        # Equivale ao antigo custo de cada envio (reescrever o Respostas.xlsx inteiro)
+        "exportar_excel": cronometrar(lambda: armazenamento.exportar_excel(os.path.join(pasta, "Respostas.xlsx")), 1),
+    }
+    invalidar_referencias(remover_sidecars=False)
+    return {
+        "tamanho": nome,
+        "parametros": parametros,
+        "linhas_acessos": len(acessos_df),
+        "respostas": armazenamento.contar(),
+        "medicoes": medicoes,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do Scorecard de Fornecedores")
+    parser.add_argument("--tamanhos", default="pequeno,medio",
+                        help=f"Lista separada por vírgula entre {', '.join(TAMANHOS)}")
+    parser.add_argument("--avaliadores", type=int, help="Tamanho personalizado (substitui --tamanhos)")
+    parser.add_argument("--categorias", type=int, default=10)
+    parser.add_argument("--fornecedores", type=int, default=10)
+    parser.add_argument("--perguntas", type=int, default=6)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="Arquivo JSON do relatório (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.avaliadores:
+        tamanhos = {"personalizado": {
+            "avaliadores": args.avaliadores, "categorias": args.categorias,
+            "fornecedores": args.fornecedores, "perguntas": args.perguntas,
+        }}
+    else:
+        tamanhos = {nome: TAMANHOS[nome] for nome in args.tamanhos.split(",")}
+
+    with tempfile.TemporaryDirectory() as pasta_base:
+        resultados = []
+        for nome, parametros in tamanhos.items():
+            print(f"Medindo {nome} {parametros}...", file=sys.stderr)
+            resultados.append(medir_tamanho(nome, parametros, args.repeticoes, pasta_base))
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.gerar_dados import gerar_planilhas
+from meliawards.armazenamento import criar_armazenamento
+
+# ======================================
+# Teste de carga do app (sem rede) com o AppTest do Streamlit:
+#   python -m benchmarks.carga --avaliadores 200 --processos 4 --saida carga.json
+# Cada processo simula um servidor: mantém várias sessões abertas e avança
+# uma etapa de cada por vez (login -> seleção -> envio -> prévia; admin).
+# O AppTest não é thread-safe, por isso o paralelismo é entre processos.
+# Relatório: vazão, p50/p95/p99 por página, erros e envios perdidos.
+# ======================================
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "appMeliAwards.py")
+PERCENTIS = (50, 95, 99)
+BOTAO_ENVIO = "Enviar avaliação"
+CAMPO_SENHA_ADMIN = "Senha do Administrador"
+
+
+class Medicoes:
+    def __init__(self):
+        self.latencias = {}
+        self.erros = {}
+        self.exemplos_erros = []
+        self.confirmados = []
+
+    def registrar(self, pagina, duracao_ms, erro=None):
+        self.latencias.setdefault(pagina, []).append(duracao_ms)
+        if erro:
+            self.registrar_erro(pagina, erro)
+
+    def registrar_erro(self, pagina, erro):
+        self.erros[pagina] = self.erros.get(pagina, 0) + 1
+        if len(self.exemplos_erros) < 20:
+            self.exemplos_erros.append(f"{pagina}: {erro}")
+
+
+def _erro_da_tela(at):
+    if len(at.exception):
+        return at.exception[0].message
+    return None
+
+
+def etapa(medicoes, pagina, at, acao=None):
+    # Executa a ação + rerun e mede; exceções do app ou do roteiro contam como erro da página
+    inicio = time.perf_counter()
+    try:
+        if acao is not None:
+            acao()
+        at.run()
+        erro = _erro_da_tela(at)
+    except Exception as excecao:
+        erro = f"{type(excecao).__name__}: {excecao}"
+    medicoes.registrar(pagina, (time.perf_counter() - inicio) * 1000, erro)
+    return erro is None
+
+
+def roteiro_avaliador(at, email, envios, rng, medicoes):
+    if not etapa(medicoes, "login", at):
+        return
+    yield
+
+    def entrar():
+        at.text_input[0].set_value(email)
+        at.button[0].click()
+
+    if not etapa(medicoes, "login", at, entrar):
+        return
+    yield
+    enviados = 0
+    tentativas = 0
+    while enviados < envios and tentativas < envios * 3:
+        tentativas += 1
+        for chave in ("tipo", "cat", "forn"):
+            caixa = at.selectbox(key=chave)
+            opcao = caixa.options[int(rng.integers(len(caixa.options)))]
+            if not etapa(medicoes, "selecao", at, lambda: caixa.set_value(opcao)):
+                return
+            yield
+        botoes = [b for b in at.button if b.label == BOTAO_ENVIO]
+        if not botoes:
+            continue  # fornecedor já avaliado por este e-mail
+        chave_envio = (at.selectbox(key="tipo").value.capitalize(), email,
+                       at.selectbox(key="cat").value, at.selectbox(key="forn").value)
+
+        def enviar():
+            for slider in at.slider:
+                slider.set_value(int(rng.integers(1, 4)))
+            botoes[0].click()
+
+        if not etapa(medicoes, "avaliacao", at, enviar):
+            return
+        if any("registrada" in s.value for s in at.success):
+            medicoes.confirmados.append(chave_envio)
+            enviados += 1
+        yield
+
+    def previa():
+        at.sidebar.radio[0].set_value("Prévia das Notas")
+
+    if etapa(medicoes, "previa", at, previa) and len(at.dataframe) < enviados:
+        medicoes.registrar_erro("previa", f"prévia de {email} mostra {len(at.dataframe)} de {enviados} envios")
+    yield
+
+
+def roteiro_admin(at, senha, interacoes, rng, medicoes):
+    if not etapa(medicoes, "login", at):
+        return
+    yield
+
+    def marcar_admin():
+        at.checkbox[0].check()
+        at.button[0].click()
+
+    # Dentro do st.form o campo de senha só aparece depois de um envio com a caixa marcada
+    if not etapa(medicoes, "login", at, marcar_admin):
+        return
+    yield
+
+    def entrar():
+        [t for t in at.text_input if t.label == CAMPO_SENHA_ADMIN][0].set_value(senha)
+        [b for b in at.button if b.label == "Entrar"][0].click()
+
+    if not etapa(medicoes, "admin", at, entrar):
+        return
+    if at.session_state["pagina"] != "admin":
+        medicoes.registrar_erro("admin", "login de administrador recusado")
+        return
+    yield
+    for _ in range(interacoes):
+        # Sem avaliações ainda não há filtros: só recarrega o painel
+        caixas = [c for c in at.selectbox if c.key == "filtro_categoria"]
+        acao = None
+        if caixas:
+            opcao = caixas[0].options[int(rng.integers(len(caixas[0].options)))]
+            acao = lambda: caixas[0].set_value(opcao)
+        if not etapa(medicoes, "admin", at, acao):
+            return
+        yield
+
+
+def executar_processo(pasta, app, emails, admins, senha_admin, envios, interacoes_admin, semente, timeout):
+    # Mesmas variáveis que o app lê; o diretório do app tem o logo
+    os.environ["MELIAWARDS_PERGUNTAS"] = os.path.join(pasta, "Perguntas.xlsx")
+    os.environ["MELIAWARDS_ACESSOS"] = os.path.join(pasta, "Acessos.xlsx")
+    os.environ["MELIAWARDS_RESPOSTAS"] = os.path.join(pasta, "Respostas.xlsx")
+    os.environ["MELIAWARDS_BANCO"] = os.path.join(pasta, "Respostas.db")
+    os.chdir(os.path.dirname(app))
+    rng = np.random.default_rng(semente)
+    medicoes = Medicoes()
+    sessoes = [roteiro_avaliador(AppTest.from_file(app, default_timeout=timeout), email, envios, rng, medicoes)
+               for email in emails]
+    sessoes += [
+        roteiro_admin(AppTest.from_file(app, default_timeout=timeout), senha_admin, interacoes_admin, rng, medicoes)
+        for _ in range(admins)
+    ]
+    inicio = time.perf_counter()
+    # Round-robin: uma etapa de cada sessão aberta por vez
+    while sessoes:
+        ativas = []
+        for sessao in sessoes:
+            try:
+                next(sessao)
+            except StopIteration:
+                continue
+            except Exception:
+                medicoes.registrar_erro("roteiro", traceback.format_exc(limit=1).strip().splitlines()[-1])
+                continue
+            ativas.append(sessao)
+        sessoes = ativas
+    return {
+        "duracao_s": time.perf_counter() - inicio,
+        "latencias": medicoes.latencias,
+        "erros": medicoes.erros,
+        "exemplos_erros": medicoes.exemplos_erros,
+        "confirmados": medicoes.confirmados,
+    }
+
+
+def _executar_processo(args):
+    return executar_processo(*args)
+
+
+def _percentis(valores):
+    return {f"p{p}_ms": round(float(np.percentile(valores, p)), 2) for p in PERCENTIS}
+
+
+def verificar_envios(banco, confirmados):
+    armazenamento = criar_armazenamento(banco)
+    perdidos = [chave for chave in confirmados if not armazenamento.ja_respondeu(*chave)]
+    gravados = armazenamento.contar()
+    return {
+        "confirmados": len(confirmados),
+        "gravados": gravados,
+        # Gravados sem confirmação na tela (a sessão não viu o "registrada com sucesso")
+        "sem_confirmacao": gravados - (len(confirmados) - len(perdidos)),
+        "perdidos": len(perdidos),
+        "exemplos_perdidos": perdidos[:10],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do app com sessões simuladas (AppTest)")
+    parser.add_argument("--avaliadores", type=int, default=200, help="Avaliadores simulados (sessões)")
+    parser.add_argument("--admins", type=int, default=4, help="Sessões do painel admin")
+    parser.add_argument("--senha-admin", default="admin123", help="Senha do painel (ADMIN_PASSWORD do app)")
+    parser.add_argument("--envios", type=int, default=2, help="Avaliações enviadas por avaliador")
+    parser.add_argument("--interacoes-admin", type=int, default=2, help="Filtros aplicados por sessão do painel admin")
+    parser.add_argument("--processos", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--categorias", type=int, default=10)
+    parser.add_argument("--fornecedores", type=int, default=8)
+    parser.add_argument("--perguntas", type=int, default=6)
+    parser.add_argument("--timeout", type=float, default=120, help="Limite (s) de cada rerun do AppTest")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="Arquivo JSON do relatório (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="carga_") as pasta:
+        gerar_planilhas(pasta, args.avaliadores, args.categorias, args.fornecedores, args.perguntas,
+                        semente=args.semente)
+        emails = pd.read_excel(os.path.join(pasta, "Acessos.xlsx"), sheet_name="Acessos")["E-mail"].unique().tolist()
+        tarefas = [
+            (pasta, APP, emails[p::args.processos], len(range(p, args.admins, args.processos)), args.senha_admin,
+             args.envios, args.interacoes_admin, args.semente + p, args.timeout)
+            for p in range(args.processos)
+        ]
+        print(f"{len(emails)} avaliadores + {args.admins} admins em {args.processos} processos...", file=sys.stderr)
+        inicio = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(args.processos) as pool:
+            resultados = pool.map(_executar_processo, tarefas)
+        duracao = time.perf_counter() - inicio
+        verificacao = verificar_envios(
+            os.path.join(pasta, "Respostas.db"), [tuple(c) for r in resultados for c in r["confirmados"]]
+        )
+
+    paginas = {}
+    for resultado in resultados:
+        for pagina, valores in resultado["latencias"].items():
+            paginas.setdefault(pagina, []).extend(valores)
+    erros = {}
+    for resultado in resultados:
+        for pagina, qtd in resultado["erros"].items():
+            erros[pagina] = erros.get(pagina, 0) + qtd
+            paginas.setdefault(pagina, [])
+    etapas = sum(len(v) for v in paginas.values())
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "parametros": vars(args),
+        "duracao_s": round(duracao, 3),
+        "vazao": {
+            "etapas_por_s": round(etapas / duracao, 2),
+            "envios_por_s": round(verificacao["confirmados"] / duracao, 2),
+        },
+        "paginas": {
+            pagina: {"amostras": len(valores), **(_percentis(valores) if valores else {}), "erros": erros.get(pagina, 0)}
+            for pagina, valores in sorted(paginas.items())
+        },
+        "erros": sum(erros.values()),
+        "exemplos_erros": [e for r in resultados for e in r["exemplos_erros"]][:20],
+        **verificacao,
+    }
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+    ok = relatorio["erros"] == 0 and verificacao["perdidos"] == 0 and verificacao["sem_confirmacao"] == 0
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
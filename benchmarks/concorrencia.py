@@ -0,0 +1,166 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.gerar_dados import gerar_perguntas
+from meliawards.armazenamento import criar_armazenamento
+from meliawards.coordenacao import criar_coordenador
+from meliawards.pontuacao import TIPOS_AVALIACAO
+from meliawards.respostas import salvar_resposta_ponderada, salvar_respostas_lote
+
+# ======================================
+# Verificação de concorrência: P processos (réplicas) x S sessões (threads)
+# enviando avaliações ao mesmo banco. Confere que todo envio confirmado está
+# gravado, que nada foi gravado duas vezes e que os agregados batem.
+#   python -m benchmarks.concorrencia --processos 4 --sessoes 25 --envios 20
+# Sai com código 1 se houver envio perdido ou inconsistência.
+# ======================================
+CATEGORIA = "CATEGORIA CONCORRENCIA"
+FORNECEDORES_DISPUTADOS = [f"FORNECEDOR DISPUTADO {i:02d}" for i in range(5)]
+EMAIL_DISPUTADO = "disputado@exemplo.com"
+
+
+def perguntas_ref(qtd_perguntas):
+    df = gerar_perguntas(qtd_perguntas)
+    return {tipo: list(zip(df[tipo], df[f"Peso_{tipo}"])) for tipo in TIPOS_AVALIACAO}
+
+
+def executar_processo(banco, processo, sessoes, envios, qtd_perguntas, coordenado):
+    # Cada sessão envia avaliações próprias (chaves únicas) e também disputa o
+    # mesmo lote de fornecedores com o mesmo e-mail: só um envio pode gravá-lo
+    armazenamento = criar_armazenamento(banco)
+    destino = criar_coordenador(armazenamento) if coordenado else armazenamento
+    referencia = perguntas_ref(qtd_perguntas)
+    perguntas = referencia["Comercial"]
+    confirmados = []
+    disputados = []
+    erros = []
+    lock = threading.Lock()
+
+    def sessao(indice):
+        email = f"p{processo:02d}s{indice:03d}@exemplo.com"
+        for envio in range(envios):
+            notas = {q: 1 + (envio + i) % 3 for i, (q, _) in enumerate(perguntas)}
+            fornecedor = f"FORNECEDOR {envio:04d}"
+            try:
+                salvar_resposta_ponderada(destino, "Comercial", email, CATEGORIA, fornecedor, notas, perguntas)
+            except Exception as erro:
+                with lock:
+                    erros.append(repr(erro))
+            else:
+                with lock:
+                    confirmados.append((email, fornecedor))
+        try:
+            salvos = salvar_respostas_lote(
+                destino, "Comercial", EMAIL_DISPUTADO, CATEGORIA, FORNECEDORES_DISPUTADOS,
+                [[2] * len(perguntas)] * len(FORNECEDORES_DISPUTADOS), perguntas,
+            )
+        except Exception as erro:
+            with lock:
+                erros.append(repr(erro))
+        else:
+            with lock:
+                disputados.extend(salvos)
+
+    threads = [threading.Thread(target=sessao, args=(i,)) for i in range(sessoes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    estatisticas = destino.estatisticas() if coordenado else {}
+    return {"confirmados": confirmados, "disputados": disputados, "erros": erros, "estatisticas": estatisticas}
+
+
+def _executar_processo(args):
+    return executar_processo(*args)
+
+
+def verificar(banco, resultados):
+    armazenamento = criar_armazenamento(banco)
+    confirmados = [chave for r in resultados for chave in r["confirmados"]]
+    disputados = [f for r in resultados for f in r["disputados"]]
+    perdidos = [
+        (email, fornecedor) for (email, fornecedor) in confirmados
+        if not armazenamento.ja_respondeu("Comercial", email, CATEGORIA, fornecedor)
+    ]
+    agregados = armazenamento.agregados()
+    qtd_agregada = int(agregados["Qtd"].sum()) if not agregados.empty else 0
+    soma_agregada = float(agregados["Soma"].sum()) if not agregados.empty else 0.0
+    armazenamento.reconstruir_agregados()
+    reconstruidos = armazenamento.agregados()
+    return {
+        "confirmados": len(confirmados),
+        "gravados": armazenamento.contar(),
+        "perdidos": len(perdidos),
+        "exemplos_perdidos": perdidos[:10],
+        # Cada fornecedor disputado deve ter sido gravado por exatamente uma sessão
+        "disputados_gravados": sorted(disputados),
+        "disputa_ok": sorted(disputados) == sorted(FORNECEDORES_DISPUTADOS),
+        "agregados_ok": (
+            qtd_agregada == int(reconstruidos["Qtd"].sum())
+            and abs(soma_agregada - float(reconstruidos["Soma"].sum())) < 1e-6
+        ),
+        "erros": [e for r in resultados for e in r["erros"]][:10],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verificação de envios simultâneos (sem perdas)")
+    parser.add_argument("--processos", type=int, default=4, help="Processos independentes (réplicas)")
+    parser.add_argument("--sessoes", type=int, default=25, help="Sessões simultâneas por processo")
+    parser.add_argument("--envios", type=int, default=20, help="Avaliações enviadas por sessão")
+    parser.add_argument("--perguntas", type=int, default=6)
+    parser.add_argument("--sem-coordenador", action="store_true",
+                        help="Grava direto no armazenamento (um commit por envio), para comparação")
+    parser.add_argument("--saida", help="Arquivo JSON do relatório (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        banco = os.path.join(pasta, "Respostas.db")
+        armazenamento = criar_armazenamento(banco)
+        armazenamento.registrar_questionario(perguntas_ref(args.perguntas))
+        tarefas = [
+            (banco, p, args.sessoes, args.envios, args.perguntas, not args.sem_coordenador)
+            for p in range(args.processos)
+        ]
+        print(f"{args.processos} processos x {args.sessoes} sessões x {args.envios} envios...", file=sys.stderr)
+        inicio = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(args.processos) as pool:
+            resultados = pool.map(_executar_processo, tarefas)
+        duracao = time.perf_counter() - inicio
+        verificacao = verificar(banco, resultados)
+
+    commits = sum(r["estatisticas"].get("commits", 0) for r in resultados)
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "parametros": vars(args),
+        "duracao_s": round(duracao, 3),
+        "envios_por_s": round(verificacao["confirmados"] / duracao, 1) if duracao else None,
+        "commits": commits or None,
+        "maior_lote": max((r["estatisticas"].get("maior_lote", 0) for r in resultados), default=0) or None,
+        **verificacao,
+    }
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+    ok = (
+        verificacao["perdidos"] == 0
+        and verificacao["gravados"] == verificacao["confirmados"] + len(FORNECEDORES_DISPUTADOS)
+        and verificacao["disputa_ok"]
+        and verificacao["agregados_ok"]
+        and not verificacao["erros"]
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
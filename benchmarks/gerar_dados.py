@@ -0,0 +1,114 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from meliawards.armazenamento import COLUNAS_FIXAS, SUFIXO_PONDERADA
+from meliawards.pontuacao import NOTA_MAXIMA, NOTA_MINIMA, TIPOS_AVALIACAO
+
+# ======================================
+# Gerador de planilhas sintéticas no formato do app:
+#   Perguntas.xlsx  (Q perguntas por tipo, pesos somando 1)
+#   Acessos.xlsx    (N avaliadores, M categorias, K fornecedores por categoria)
+#   Respostas.xlsx  (opcional, formato largo antigo)
+# ======================================
+
+
+def gerar_perguntas(qtd_perguntas):
+    colunas = {}
+    for tipo in TIPOS_AVALIACAO:
+        colunas[tipo] = [f"Pergunta {i:02d} ({tipo}):\nTexto descritivo da pergunta {i}" for i in range(1, qtd_perguntas + 1)]
+        colunas[f"Peso_{tipo}"] = [round(1 / qtd_perguntas, 4)] * qtd_perguntas
+    return pd.DataFrame(colunas)
+
+
+def gerar_acessos(avaliadores, categorias, fornecedores, categorias_por_avaliador=2, semente=0):
+    rng = np.random.default_rng(semente)
+    nomes_categorias = [f"CATEGORIA {c:03d}" for c in range(1, categorias + 1)]
+    linhas = []
+    for a in range(avaliadores):
+        email = f"avaliador{a:05d}@exemplo.com"
+        tipo = TIPOS_AVALIACAO[a % len(TIPOS_AVALIACAO)]
+        escolhidas = rng.choice(nomes_categorias, size=min(categorias_por_avaliador, categorias), replace=False)
+        for categoria in escolhidas:
+            linhas.append((email, tipo, categoria, np.nan))
+    acessos = pd.DataFrame(linhas, columns=["E-mail", "Avaliação", "Categoria", "Senha"])
+    categorias_df = pd.DataFrame(
+        [(c, f"FORNECEDOR {i:03d} {c}") for c in nomes_categorias for i in range(1, fornecedores + 1)],
+        columns=["Categoria", "Razão Social"],
+    )
+    return acessos, categorias_df
+
+
+def gerar_respostas(acessos, categorias_df, perguntas_df, taxa_resposta=0.5, semente=0):
+    # Uma linha por avaliação: Tipo, E-mail, Categoria, Fornecedor, Data, Hora, Q1..Qn (notas puras)
+    rng = np.random.default_rng(semente)
+    fornecedores = categorias_df.groupby("Categoria")["Razão Social"].apply(list).to_dict()
+    qtd_perguntas = len(perguntas_df)
+    linhas = []
+    for email, tipo, categoria in zip(acessos["E-mail"], acessos["Avaliação"], acessos["Categoria"]):
+        for fornecedor in fornecedores.get(categoria, []):
+            if rng.random() < taxa_resposta:
+                linhas.append((tipo, email, categoria, fornecedor))
+    df = pd.DataFrame(linhas, columns=["Tipo", "E-mail", "Categoria", "Fornecedor"])
+    df["Data"] = "01/07/2025"
+    df["Hora"] = "12:00:00"
+    notas = rng.integers(NOTA_MINIMA, NOTA_MAXIMA + 1, size=(len(df), qtd_perguntas))
+    for i in range(qtd_perguntas):
+        df[f"Q{i + 1}"] = notas[:, i]
+    return df
+
+
+def respostas_formato_largo(respostas, perguntas_df):
+    # Converte para o layout antigo do Respostas.xlsx (uma aba por tipo, com colunas PONDERADA)
+    abas = {}
+    for tipo, grupo in respostas.groupby("Tipo", sort=False):
+        questoes = perguntas_df[tipo].tolist()
+        pesos = perguntas_df[f"Peso_{tipo}"].to_numpy()
+        notas = grupo[[f"Q{i + 1}" for i in range(len(questoes))]].to_numpy()
+        largo = grupo[COLUNAS_FIXAS].reset_index(drop=True)
+        largo[questoes] = notas
+        largo[[q + SUFIXO_PONDERADA for q in questoes]] = notas * pesos
+        abas[tipo.capitalize()] = largo
+    return abas
+
+
+def gerar_planilhas(pasta, avaliadores, categorias, fornecedores, perguntas,
+                    categorias_por_avaliador=2, taxa_resposta=0.5, escrever_respostas=False, semente=0):
+    os.makedirs(pasta, exist_ok=True)
+    perguntas_df = gerar_perguntas(perguntas)
+    acessos, categorias_df = gerar_acessos(avaliadores, categorias, fornecedores, categorias_por_avaliador, semente)
+    respostas = gerar_respostas(acessos, categorias_df, perguntas_df, taxa_resposta, semente)
+    perguntas_df.to_excel(os.path.join(pasta, "Perguntas.xlsx"), index=False)
+    with pd.ExcelWriter(os.path.join(pasta, "Acessos.xlsx"), engine="openpyxl") as writer:
+        acessos.to_excel(writer, sheet_name="Acessos", index=False)
+        categorias_df.to_excel(writer, sheet_name="Categorias", index=False)
+    if escrever_respostas:
+        with pd.ExcelWriter(os.path.join(pasta, "Respostas.xlsx"), engine="openpyxl") as writer:
+            for aba, df in respostas_formato_largo(respostas, perguntas_df).items():
+                df.to_excel(writer, sheet_name=aba, index=False)
+    return respostas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera planilhas sintéticas do Scorecard")
+    parser.add_argument("pasta")
+    parser.add_argument("--avaliadores", type=int, default=100)
+    parser.add_argument("--categorias", type=int, default=10)
+    parser.add_argument("--fornecedores", type=int, default=10)
+    parser.add_argument("--perguntas", type=int, default=6)
+    parser.add_argument("--categorias-por-avaliador", type=int, default=2)
+    parser.add_argument("--taxa-resposta", type=float, default=0.5)
+    parser.add_argument("--com-respostas", action="store_true", help="Também grava Respostas.xlsx (formato antigo)")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+    respostas = gerar_planilhas(
+        args.pasta, args.avaliadores, args.categorias, args.fornecedores, args.perguntas,
+        args.categorias_por_avaliador, args.taxa_resposta, args.com_respostas, args.semente,
+    )
+    print(f"Planilhas geradas em {args.pasta} ({len(respostas)} respostas sintéticas)")
+
+
+if __name__ == "__main__":
+    main()
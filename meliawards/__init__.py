@@ -0,0 +1,2 @@
+# Biblioteca de apoio ao Scorecard de Fornecedores - Meli Awards
+# (nenhum módulo deste pacote importa streamlit)
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from .armazenamento import chave_email
+
+
+def carregar_acessos(path):
+    acessos = pd.read_excel(path, sheet_name='Acessos')
+    categorias = pd.read_excel(path, sheet_name='Categorias')
+    return acessos, categorias
+
+
+def carregar_indice_acessos(path):
+    return IndiceAcessos(*carregar_acessos(path))
+
+
+# ======================================
+# Índice de permissões montado uma vez por versão do Acessos.xlsx
+# e-mail normalizado -> tipo (minúsculo) -> categorias (dict como conjunto ordenado)
+# categoria -> fornecedores (aba "Categorias")
+# ======================================
+class IndiceAcessos:
+    def __init__(self, acessos, categorias):
+        self.tipos = {}
+        self.permissoes = {}
+        self.fornecedores = {}
+        for email, tipo, categoria in zip(acessos.iloc[:, 0], acessos.iloc[:, 1], acessos.iloc[:, 2]):
+            if not isinstance(email, str):
+                continue
+            email = chave_email(email)
+            if not isinstance(tipo, str):
+                continue
+            self.tipos.setdefault(email, {}).setdefault(tipo, None)
+            cats = self.permissoes.setdefault(email, {}).setdefault(tipo.lower(), {})
+            if categoria == categoria:  # ignora NaN
+                cats.setdefault(categoria, None)
+        for categoria, fornecedor in zip(categorias.iloc[:, 0], categorias.iloc[:, 1]):
+            if fornecedor == fornecedor:
+                self.fornecedores.setdefault(categoria, []).append(fornecedor)
+
+    def tipos_do_usuario(self, email):
+        return list(self.tipos.get(chave_email(email), ()))
+
+    def categorias_do_usuario(self, email, tipo):
+        return list(self.permissoes.get(chave_email(email), {}).get(str(tipo).lower(), ()))
+
+    def tem_acesso(self, email, tipo, categoria):
+        return categoria in self.permissoes.get(chave_email(email), {}).get(str(tipo).lower(), ())
+
+    def fornecedores_da_categoria(self, categoria):
+        return list(self.fornecedores.get(categoria, ()))
+
+
+def checar_usuario(email, tipo, categoria, acessos):
+    return acessos.tem_acesso(email, tipo, categoria)
+
+
+def get_opcoes_tipo(email, acessos):
+    return acessos.tipos_do_usuario(email)
+
+
+def get_opcoes_categorias(email, tipo, acessos):
+    return acessos.categorias_do_usuario(email, tipo)
+
+
+def fornecedores_para_categoria(categoria, acessos):
+    return acessos.fornecedores_da_categoria(categoria)
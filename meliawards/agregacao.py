@@ -0,0 +1,18 @@
+import pandas as pd
+
+# ======================================
+# Agregados das notas ponderadas por (aba, categoria, fornecedor)
+# Qtd = nº de avaliações, Soma = soma dos totais ponderados de cada avaliação
+# ======================================
+COLUNAS_AGREGADOS = ["Aba", "Categoria", "Fornecedor", "Qtd", "Soma"]
+
+
+def total_ponderado(ponderadas):
+    return float(sum(v for v in ponderadas.values() if v is not None and pd.notnull(v)))
+
+
+def resumir_agregados(agregados, por):
+    # Contagem, soma e média ponderada agrupadas por uma ou mais colunas dos agregados
+    resumo = agregados.groupby(por)[["Qtd", "Soma"]].sum()
+    resumo["Média Ponderada"] = resumo["Soma"] / resumo["Qtd"]
+    return resumo.rename(columns={"Qtd": "Qtd. Avaliações", "Soma": "Soma Ponderada"})
@@ -0,0 +1,842 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: fica só o lock do próprio SQLite
+    fcntl = None
+
+from .agregacao import COLUNAS_AGREGADOS, total_ponderado
+from .exportacao import TAMANHO_BLOCO
+from .pontuacao import TIPOS_AVALIACAO, rotulo_tipo
+from .ranking import nota_combinada
+
+COLUNAS_FIXAS = ["Data", "Hora", "E-mail", "Categoria", "Fornecedor"]
+SUFIXO_PONDERADA = " (PONDERADA)"
+
+
+def chave_email(email):
+    return str(email).strip().lower()
+
+
+# ======================================
+# Interface comum dos backends de persistência: um backend sem algum dos
+# métodos abstratos falha já ao ser instanciado
+# Upsert por (aba, E-mail, Categoria, Fornecedor), como era feito no Respostas.xlsx
+# ======================================
+class ArmazenamentoRespostas(ABC):
+    # Gravação
+    @abstractmethod
+    def salvar(self, aba, registro):
+        raise NotImplementedError
+
+    @abstractmethod
+    def salvar_lote(self, aba, registros, substituir=False):
+        raise NotImplementedError
+
+    @abstractmethod
+    def gravar_lotes(self, pedidos, duravel=False):
+        raise NotImplementedError
+
+    @abstractmethod
+    def registrar_questionario(self, perguntas_ref, origem="Perguntas.xlsx"):
+        raise NotImplementedError
+
+    # Consultas
+    @abstractmethod
+    def abas(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def carregar(self, aba):
+        raise NotImplementedError
+
+    @abstractmethod
+    def ja_respondeu(self, aba, email, categoria, fornecedor):
+        raise NotImplementedError
+
+    @abstractmethod
+    def fornecedores_respondidos(self, aba, email, categoria):
+        raise NotImplementedError
+
+    @abstractmethod
+    def respostas_do_avaliador(self, email):
+        raise NotImplementedError
+
+    @abstractmethod
+    def contar(self, filtros=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def pagina(self, filtros=None, limite=50, deslocamento=0):
+        raise NotImplementedError
+
+    # Agregados e ranking
+    @abstractmethod
+    def agregados(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def reconstruir_agregados(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def configurar_ranking(self, configuracao):
+        raise NotImplementedError
+
+    @abstractmethod
+    def ranking(self, categoria, k=10):
+        raise NotImplementedError
+
+    @abstractmethod
+    def categorias_ranking(self):
+        raise NotImplementedError
+
+    # Exportações
+    @abstractmethod
+    def linhas_respostas(self, filtros=None, tamanho_bloco=TAMANHO_BLOCO):
+        raise NotImplementedError
+
+    @abstractmethod
+    def linhas_scorecard(self):
+        raise NotImplementedError
+
+    def exportar_excel(self, destino, legado=None):
+        tabela = {aba: self.carregar(aba) for aba in self.abas()}
+        # Copia do Respostas.xlsx antigo as abas que não são de respostas (ex.:
+        # "Consolidado"), como o antigo salvar_excel; destino pode ser um buffer
+        abas_existentes = {}
+        if legado and os.path.exists(legado):
+            xls = pd.ExcelFile(legado)
+            abas_existentes = {s: pd.read_excel(xls, sheet_name=s) for s in xls.sheet_names if s not in tabela}
+        with pd.ExcelWriter(destino, engine="openpyxl", mode="w") as writer:
+            for aba, df in tabela.items():
+                df.to_excel(writer, sheet_name=aba, index=False)
+            for aba, df in abas_existentes.items():
+                df.to_excel(writer, sheet_name=aba, index=False)
+
+
+def montar_registro(data, hora, email, categoria, fornecedor, notas, ponderadas):
+    return {
+        "Data": data,
+        "Hora": hora,
+        "E-mail": email,
+        "Categoria": categoria,
+        "Fornecedor": fornecedor,
+        "notas": dict(notas),
+        "ponderadas": dict(ponderadas),
+    }
+
+
+def _resposta_avaliador(aba, categoria, fornecedor, total, ponderadas):
+    return {"Aba": aba, "Categoria": categoria, "Fornecedor": fornecedor, "Total": total, "ponderadas": ponderadas}
+
+
+def registros_para_df(registros):
+    if not registros:
+        return pd.DataFrame()
+    perguntas = {}
+    for reg in registros:
+        for q in reg["notas"]:
+            perguntas.setdefault(q, None)
+        for q in reg["ponderadas"]:
+            perguntas.setdefault(q, None)
+    colunas = COLUNAS_FIXAS + list(perguntas) + [q + SUFIXO_PONDERADA for q in perguntas]
+    linhas = []
+    for reg in registros:
+        linha = [reg[c] for c in COLUNAS_FIXAS]
+        linha += [reg["notas"].get(q) for q in perguntas]
+        linha += [reg["ponderadas"].get(q) for q in perguntas]
+        linhas.append(linha)
+    return pd.DataFrame(linhas, columns=colunas)
+
+
+def registros_do_excel(path):
+    # Lê as abas de respostas de um Respostas.xlsx no formato antigo (largo)
+    resultado = {}
+    if not os.path.exists(path):
+        return resultado
+    xls = pd.ExcelFile(path)
+    for aba in xls.sheet_names:
+        df = pd.read_excel(xls, sheet_name=aba)
+        if not {"E-mail", "Categoria", "Fornecedor"}.issubset(df.columns):
+            continue
+        perguntas = [c for c in df.columns if c not in COLUNAS_FIXAS and not str(c).endswith(SUFIXO_PONDERADA)]
+        registros = []
+        for linha in df.to_dict("records"):
+            if pd.isnull(linha["E-mail"]):
+                continue
+            notas = {q: linha[q] for q in perguntas if pd.notnull(linha[q]) and linha[q] != ""}
+            ponderadas = {}
+            for q in perguntas:
+                v = linha.get(q + SUFIXO_PONDERADA)
+                if v is not None and pd.notnull(v) and v != "":
+                    ponderadas[q] = v
+            registros.append(montar_registro(
+                "" if pd.isnull(linha.get("Data")) else str(linha.get("Data")),
+                "" if pd.isnull(linha.get("Hora")) else str(linha.get("Hora")),
+                str(linha["E-mail"]), str(linha["Categoria"]), str(linha["Fornecedor"]),
+                notas, ponderadas,
+            ))
+        resultado[aba] = registros
+    return resultado
+
+
+def _valor_json(v):
+    # numpy -> tipos nativos para o json
+    return v.item() if hasattr(v, "item") else v
+
+
+def linhas_questionario(perguntas_ref):
+    # {tipo: [(pergunta, peso), ...]} (ler_perguntas) -> [(aba, pergunta, ordem, peso), ...]
+    linhas = []
+    for tipo, perguntas in perguntas_ref.items():
+        for ordem, (pergunta, peso) in enumerate(perguntas):
+            linhas.append((str(tipo).capitalize(), pergunta, ordem, float(peso)))
+    return linhas
+
+
+def questionario_inferido(registros_por_aba):
+    # Pesos implícitos nas ponderadas já gravadas (ponderada / nota), para
+    # históricos importados sem o Perguntas.xlsx que os gerou
+    linhas = []
+    for aba, registros in registros_por_aba.items():
+        razoes = {}
+        for registro in registros:
+            for pergunta, nota in registro["notas"].items():
+                ponderada = registro["ponderadas"].get(pergunta)
+                try:
+                    razao = float(ponderada) / float(nota)
+                except (TypeError, ValueError, ZeroDivisionError):
+                    continue
+                razoes.setdefault(pergunta, []).append(razao)
+        for ordem, (pergunta, valores) in enumerate(razoes.items()):
+            linhas.append((aba, pergunta, ordem, round(sum(valores) / len(valores), 10)))
+    return linhas
+
+
+# ======================================
+# Backend padrão: SQLite local (WAL). Cada envio é um único upsert atômico,
+# com custo independente do total de respostas já gravadas.
+# Notas puras em formato longo (uma linha por envio e pergunta); as ponderadas
+# vêm do join com a versão ativa do questionário, nunca ficam gravadas.
+# ======================================
+_SQL_PONDERADA = (
+    "LEFT JOIN pesos ON pesos.versao = ? AND pesos.aba = respostas.aba AND pesos.pergunta = notas.pergunta"
+)
+_SQL_REGISTROS = (
+    "SELECT respostas.id, respostas.aba, respostas.data, respostas.hora, respostas.email, "
+    "respostas.categoria, respostas.fornecedor, respostas.total, notas.pergunta, notas.nota, notas.nota * pesos.peso "
+    "FROM respostas LEFT JOIN notas ON notas.resposta = respostas.id " + _SQL_PONDERADA
+)
+
+
+class ArmazenamentoSQLite(ArmazenamentoRespostas):
+    VERSAO_ESQUEMA = 6
+
+    def __init__(self, path, legado=None):
+        self.path = os.path.abspath(path)
+        self._local = threading.local()
+        self.trava = TravaArquivo(self.path + ".lock")
+        self._migrar(legado)
+
+    def _conexao(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _transacao(self):
+        return _Transacao(self._conexao(), self.trava)
+
+    def _migrar(self, legado=None):
+        # Banco novo: esquema e importação do Respostas.xlsx antigo numa única
+        # transação. Se a importação falhar nada fica gravado (user_version
+        # continua 0) e ela é refeita na próxima abertura
+        with self._transacao() as con:
+            versao = con.execute("PRAGMA user_version").fetchone()[0]
+            if versao < self.VERSAO_ESQUEMA:
+                self._criar_esquema(con)
+                if legado:
+                    self._importar_excel(con, legado)
+            con.execute(f"PRAGMA user_version = {self.VERSAO_ESQUEMA}")
+
+    def _criar_esquema(self, con):
+        # Uma linha por envio; id INTEGER PRIMARY KEY é o identificador estável
+        # do envio (rowid pode mudar no VACUUM). Notas puras em formato longo;
+        # as ponderadas saem do join com os pesos da versão ativa do questionário
+        con.execute("""
+            CREATE TABLE respostas (
+                id INTEGER PRIMARY KEY,
+                aba TEXT NOT NULL,
+                email_chave TEXT NOT NULL,
+                categoria TEXT NOT NULL,
+                fornecedor TEXT NOT NULL,
+                email TEXT NOT NULL,
+                data TEXT,
+                hora TEXT,
+                total REAL NOT NULL DEFAULT 0,
+                UNIQUE (aba, email_chave, categoria, fornecedor)
+            )""")
+        con.execute("""
+            CREATE TABLE notas (
+                resposta INTEGER NOT NULL,
+                pergunta TEXT NOT NULL,
+                ordem INTEGER NOT NULL,
+                nota NUMERIC NOT NULL,
+                PRIMARY KEY (resposta, pergunta)
+            )""")
+        con.execute("""
+            CREATE TABLE questionarios (
+                versao INTEGER PRIMARY KEY,
+                criado_em TEXT NOT NULL,
+                origem TEXT NOT NULL
+            )""")
+        con.execute("""
+            CREATE TABLE pesos (
+                versao INTEGER NOT NULL,
+                aba TEXT NOT NULL,
+                pergunta TEXT NOT NULL,
+                ordem INTEGER NOT NULL,
+                peso REAL NOT NULL,
+                PRIMARY KEY (versao, aba, pergunta)
+            )""")
+        # Total ponderado agregado por fornecedor, mantido a cada envio
+        con.execute("""
+            CREATE TABLE agregados (
+                aba TEXT NOT NULL,
+                categoria TEXT NOT NULL,
+                fornecedor TEXT NOT NULL,
+                qtd INTEGER NOT NULL,
+                soma REAL NOT NULL,
+                PRIMARY KEY (aba, categoria, fornecedor)
+            )""")
+        # Ranking materializado por categoria; índice serve o top-k sem ordenar tudo
+        con.execute("CREATE TABLE configuracao (chave TEXT PRIMARY KEY, valor TEXT NOT NULL)")
+        con.execute("""
+            CREATE TABLE ranking (
+                categoria TEXT NOT NULL,
+                fornecedor TEXT NOT NULL,
+                nota REAL NOT NULL,
+                qtd INTEGER NOT NULL,
+                PRIMARY KEY (categoria, fornecedor)
+            )""")
+        con.execute("CREATE INDEX idx_ranking_nota ON ranking (categoria, nota DESC)")
+        # Filtros da tabela paginada do painel admin
+        con.execute("CREATE INDEX idx_respostas_categoria ON respostas (categoria, fornecedor)")
+        con.execute("CREATE INDEX idx_respostas_fornecedor ON respostas (fornecedor)")
+        # Prévia das Notas: só os envios do próprio avaliador, sem varrer a tabela
+        con.execute("CREATE INDEX idx_respostas_email ON respostas (email_chave)")
+
+    # ======================================
+    # Questionário versionado: cada alteração de pesos no Perguntas.xlsx vira
+    # uma nova versão; a maior é a ativa. Trocar de versão repondera todo o
+    # histórico numa única passada (join notas x pesos), sem reescrever notas.
+    # ======================================
+    def _versao_questionario(self, con):
+        return con.execute("SELECT MAX(versao) FROM questionarios").fetchone()[0]
+
+    def _linhas_questionario(self, con, versao):
+        return con.execute(
+            "SELECT aba, pergunta, ordem, peso FROM pesos WHERE versao = ? ORDER BY aba, ordem", (versao,)
+        ).fetchall()
+
+    def _inserir_questionario(self, con, linhas, origem):
+        versao = (self._versao_questionario(con) or 0) + 1
+        con.execute(
+            "INSERT INTO questionarios (versao, criado_em, origem) VALUES (?, ?, ?)",
+            (versao, datetime.now().isoformat(timespec="seconds"), origem),
+        )
+        con.executemany(
+            "INSERT INTO pesos (versao, aba, pergunta, ordem, peso) VALUES (?, ?, ?, ?, ?)",
+            [(versao,) + tuple(linha) for linha in linhas],
+        )
+        return versao
+
+    def _reponderar(self, con, versao):
+        con.execute(
+            "UPDATE respostas SET total = COALESCE(("
+            "SELECT SUM(notas.nota * pesos.peso) FROM notas JOIN pesos ON pesos.versao = ? "
+            "AND pesos.aba = respostas.aba AND pesos.pergunta = notas.pergunta "
+            "WHERE notas.resposta = respostas.id), 0)",
+            (versao,),
+        )
+        self._reconstruir_agregados(con)
+        configuracao = self._configuracao_ranking(con)
+        if configuracao is not None:
+            self._reconstruir_ranking(con, configuracao)
+
+    def _versao_da_aba(self, con, aba, registro):
+        # Aba sem pesos na versão ativa (banco novo, ou aba ainda não registrada):
+        # os pesos do próprio envio (ponderada / nota) entram numa nova versão,
+        # para que as ponderadas do envio não se percam no join notas x pesos
+        versao = self._versao_questionario(con)
+        if versao is not None and con.execute(
+            "SELECT 1 FROM pesos WHERE versao = ? AND aba = ? LIMIT 1", (versao, aba)
+        ).fetchone():
+            return versao
+        inferidas = questionario_inferido({aba: [registro]})
+        if not inferidas:
+            return versao
+        linhas = self._linhas_questionario(con, versao) if versao is not None else []
+        return self._inserir_questionario(con, linhas + inferidas, "pesos do envio")
+
+    def registrar_questionario(self, perguntas_ref, origem="Perguntas.xlsx"):
+        # Chamado a cada execução do app; só cria versão (e repondera) quando os pesos mudam.
+        # A versão ativa é conferida no banco: se outro processo registrou pesos
+        # diferentes, o Perguntas.xlsx do app volta a valer
+        linhas = sorted(linhas_questionario(perguntas_ref))
+        if (linhas == getattr(self, "_ultimo_questionario", None)
+                and self._versao_questionario(self._conexao()) == self._ultima_versao):
+            return self._ultima_versao
+        with self._transacao() as con:
+            versao = self._versao_questionario(con)
+            if versao is None or sorted(self._linhas_questionario(con, versao)) != linhas:
+                versao = self._inserir_questionario(con, linhas, origem)
+                self._reponderar(con, versao)
+        self._ultimo_questionario = linhas
+        self._ultima_versao = versao
+        return versao
+
+    def questionario(self, versao=None):
+        con = self._conexao()
+        versao = versao or self._versao_questionario(con)
+        return pd.DataFrame(
+            self._linhas_questionario(con, versao) if versao else [],
+            columns=["Aba", "Pergunta", "Ordem", "Peso"],
+        )
+
+    def versoes_questionario(self):
+        cur = self._conexao().execute(
+            "SELECT questionarios.versao, criado_em, origem, COUNT(pesos.pergunta) FROM questionarios "
+            "LEFT JOIN pesos ON pesos.versao = questionarios.versao GROUP BY questionarios.versao ORDER BY questionarios.versao"
+        )
+        return pd.DataFrame(cur.fetchall(), columns=["Versão", "Criado em", "Origem", "Perguntas"])
+
+    def _gravar(self, con, aba, registro):
+        chave = (aba, chave_email(registro["E-mail"]), registro["Categoria"], registro["Fornecedor"])
+        anterior = con.execute(
+            "SELECT id, total FROM respostas WHERE aba = ? AND email_chave = ? AND categoria = ? AND fornecedor = ?",
+            chave,
+        ).fetchone()
+        if anterior:
+            con.execute("DELETE FROM notas WHERE resposta = ?", (anterior[0],))
+        # INSERT OR REPLACE remove a linha antiga e insere ao final (novo id),
+        # mesma ordem que o antigo "remove + concat" no DataFrame
+        resposta = con.execute(
+            "INSERT OR REPLACE INTO respostas (aba, email_chave, categoria, fornecedor, email, data, hora) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            chave + (registro["E-mail"], registro["Data"], registro["Hora"]),
+        ).lastrowid
+        con.executemany(
+            "INSERT INTO notas (resposta, pergunta, ordem, nota) VALUES (?, ?, ?, ?)",
+            [(resposta, q, ordem, _valor_json(v)) for ordem, (q, v) in enumerate(registro["notas"].items())],
+        )
+        versao = self._versao_da_aba(con, aba, registro)
+        if versao is None:
+            # Nenhuma nota diferente de zero para inferir pesos
+            total = total_ponderado(registro["ponderadas"])
+        else:
+            total = con.execute(
+                "SELECT COALESCE(SUM(notas.nota * pesos.peso), 0) FROM notas JOIN pesos ON pesos.versao = ? "
+                "AND pesos.aba = ? AND pesos.pergunta = notas.pergunta WHERE notas.resposta = ?",
+                (versao, aba, resposta),
+            ).fetchone()[0]
+        con.execute("UPDATE respostas SET total = ? WHERE id = ?", (total, resposta))
+        # Atualização incremental dos agregados (substituição não conta duas vezes)
+        delta_qtd, delta_soma = (0, total - anterior[1]) if anterior else (1, total)
+        con.execute(
+            "INSERT INTO agregados (aba, categoria, fornecedor, qtd, soma) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (aba, categoria, fornecedor) DO UPDATE SET qtd = qtd + excluded.qtd, soma = soma + excluded.soma",
+            (aba, registro["Categoria"], registro["Fornecedor"], delta_qtd, delta_soma),
+        )
+        configuracao = self._configuracao_ranking(con)
+        if configuracao is not None:
+            self._atualizar_ranking(con, configuracao, registro["Categoria"], registro["Fornecedor"])
+
+    def _configuracao_ranking(self, con):
+        linha = con.execute("SELECT valor FROM configuracao WHERE chave = 'ranking'").fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def _atualizar_ranking(self, con, configuracao, categoria, fornecedor):
+        linhas = con.execute(
+            "SELECT aba, qtd, soma FROM agregados WHERE categoria = ? AND fornecedor = ? AND qtd > 0",
+            (categoria, fornecedor),
+        ).fetchall()
+        nota = nota_combinada({aba: soma / qtd for (aba, qtd, soma) in linhas}, configuracao)
+        if nota is None:
+            con.execute("DELETE FROM ranking WHERE categoria = ? AND fornecedor = ?", (categoria, fornecedor))
+        else:
+            con.execute(
+                "INSERT OR REPLACE INTO ranking (categoria, fornecedor, nota, qtd) VALUES (?, ?, ?, ?)",
+                (categoria, fornecedor, nota, sum(qtd for (_, qtd, _) in linhas)),
+            )
+
+    def _reconstruir_ranking(self, con, configuracao):
+        con.execute("DELETE FROM ranking")
+        pares = con.execute("SELECT DISTINCT categoria, fornecedor FROM agregados WHERE qtd > 0").fetchall()
+        for categoria, fornecedor in pares:
+            self._atualizar_ranking(con, configuracao, categoria, fornecedor)
+
+    def configurar_ranking(self, configuracao):
+        # Chamado a cada execução do app; só reconstrói quando pesos/máximos mudam
+        if configuracao == getattr(self, "_ultima_configuracao", None):
+            return
+        with self._transacao() as con:
+            if self._configuracao_ranking(con) != configuracao:
+                con.execute(
+                    "INSERT OR REPLACE INTO configuracao (chave, valor) VALUES ('ranking', ?)",
+                    (json.dumps(configuracao, ensure_ascii=False),),
+                )
+                self._reconstruir_ranking(con, configuracao)
+        self._ultima_configuracao = configuracao
+
+    def ranking(self, categoria, k=10):
+        cur = self._conexao().execute(
+            "SELECT fornecedor, nota, qtd FROM ranking WHERE categoria = ? ORDER BY nota DESC LIMIT ?",
+            (categoria, k),
+        )
+        return pd.DataFrame(cur.fetchall(), columns=["Fornecedor", "Nota Final", "Qtd. Avaliações"])
+
+    def categorias_ranking(self):
+        cur = self._conexao().execute("SELECT DISTINCT categoria FROM ranking ORDER BY categoria")
+        return [r[0] for r in cur.fetchall()]
+
+    def _reconstruir_agregados(self, con):
+        con.execute("DELETE FROM agregados")
+        con.execute(
+            "INSERT INTO agregados (aba, categoria, fornecedor, qtd, soma) "
+            "SELECT aba, categoria, fornecedor, COUNT(*), SUM(total) FROM respostas GROUP BY aba, categoria, fornecedor"
+        )
+
+    def reconstruir_agregados(self):
+        with self._transacao() as con:
+            self._reconstruir_agregados(con)
+            configuracao = self._configuracao_ranking(con)
+            if configuracao is not None:
+                self._reconstruir_ranking(con, configuracao)
+
+    def agregados(self):
+        # Tabela pequena (uma linha por aba/categoria/fornecedor), independente do volume de respostas
+        cur = self._conexao().execute("SELECT aba, categoria, fornecedor, qtd, soma FROM agregados WHERE qtd > 0")
+        return pd.DataFrame(cur.fetchall(), columns=COLUNAS_AGREGADOS)
+
+    def salvar(self, aba, registro):
+        with self._transacao() as con:
+            self._gravar(con, aba, registro)
+
+    def _gravar_lote(self, con, aba, registros, substituir):
+        # Sem substituir, chaves já respondidas são puladas (um envio por usuário)
+        salvos = []
+        for registro in registros:
+            chave = (aba, chave_email(registro["E-mail"]), registro["Categoria"], registro["Fornecedor"])
+            existe = None if substituir else con.execute(
+                "SELECT 1 FROM respostas WHERE aba = ? AND email_chave = ? AND categoria = ? AND fornecedor = ?",
+                chave,
+            ).fetchone()
+            if existe is None:
+                self._gravar(con, aba, registro)
+                salvos.append(registro["Fornecedor"])
+        return salvos
+
+    def salvar_lote(self, aba, registros, substituir=False):
+        with self._transacao() as con:
+            return self._gravar_lote(con, aba, registros, substituir)
+
+    def gravar_lotes(self, pedidos, duravel=False):
+        # Vários envios numa única transação (um commit só). Cada envio fica num
+        # SAVEPOINT: um erro descarta apenas o próprio envio, não o lote inteiro
+        con = self._conexao()
+        if duravel:
+            # fsync a cada commit; o custo é dividido entre os envios agrupados
+            con.execute("PRAGMA synchronous=FULL")
+        resultados = []
+        with self._transacao() as con:
+            for aba, registros, substituir in pedidos:
+                con.execute("SAVEPOINT envio")
+                try:
+                    resultados.append(self._gravar_lote(con, aba, registros, substituir))
+                except Exception as erro:
+                    con.execute("ROLLBACK TO envio")
+                    resultados.append(erro)
+                con.execute("RELEASE envio")
+        return resultados
+
+    def _importar_excel(self, con, path):
+        registros_por_aba = registros_do_excel(path)
+        if self._versao_questionario(con) is None and registros_por_aba:
+            self._inserir_questionario(con, questionario_inferido(registros_por_aba), os.path.basename(path))
+        for aba, registros in registros_por_aba.items():
+            for registro in registros:
+                self._gravar(con, aba, registro)
+
+    # A chave primária (aba, email_chave, categoria, fornecedor) é o índice
+    # persistente de "já respondeu", atualizado na mesma transação de cada envio
+    def ja_respondeu(self, aba, email, categoria, fornecedor):
+        cur = self._conexao().execute(
+            "SELECT 1 FROM respostas WHERE aba = ? AND email_chave = ? AND categoria = ? AND fornecedor = ?",
+            (aba, chave_email(email), categoria, fornecedor),
+        )
+        return cur.fetchone() is not None
+
+    def fornecedores_respondidos(self, aba, email, categoria):
+        cur = self._conexao().execute(
+            "SELECT fornecedor FROM respostas WHERE aba = ? AND email_chave = ? AND categoria = ?",
+            (aba, chave_email(email), categoria),
+        )
+        return {r[0] for r in cur.fetchall()}
+
+    def _filtro(self, filtros):
+        filtros = filtros or {}
+        condicoes = []
+        parametros = []
+        for campo in ("aba", "categoria", "fornecedor"):
+            if filtros.get(campo):
+                condicoes.append(f"respostas.{campo} = ?")
+                parametros.append(filtros[campo])
+        if filtros.get("email"):
+            condicoes.append("instr(respostas.email_chave, ?) > 0")
+            parametros.append(chave_email(filtros["email"]))
+        return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), parametros
+
+    def contar(self, filtros=None):
+        where, parametros = self._filtro(filtros)
+        return self._conexao().execute(f"SELECT COUNT(*) FROM respostas{where}", parametros).fetchone()[0]
+
+    def _registros(self, where="", parametros=(), tamanho_bloco=TAMANHO_BLOCO):
+        # (aba, registro, total) na ordem de envio, remontados a partir das linhas longas
+        con = self._conexao()
+        cur = con.execute(
+            f"{_SQL_REGISTROS}{where} ORDER BY respostas.id, notas.ordem",
+            [self._versao_questionario(con)] + list(parametros),
+        )
+        atual = None
+        while True:
+            bloco = cur.fetchmany(tamanho_bloco)
+            if not bloco:
+                break
+            for (resposta, aba, data, hora, email, categoria, fornecedor, total, pergunta, nota, ponderada) in bloco:
+                if atual is None or resposta != atual[0]:
+                    if atual is not None:
+                        yield atual[1], atual[2], atual[3]
+                    atual = (resposta, aba, montar_registro(data, hora, email, categoria, fornecedor, {}, {}), total)
+                if pergunta is not None:
+                    atual[2]["notas"][pergunta] = nota
+                    if ponderada is not None:
+                        atual[2]["ponderadas"][pergunta] = ponderada
+        if atual is not None:
+            yield atual[1], atual[2], atual[3]
+
+    def pagina(self, filtros=None, limite=50, deslocamento=0):
+        where, parametros = self._filtro(filtros)
+        registros = list(self._registros(
+            f" WHERE respostas.id IN (SELECT respostas.id FROM respostas{where} ORDER BY respostas.id LIMIT ? OFFSET ?)",
+            parametros + [limite, deslocamento],
+        ))
+        df = registros_para_df([registro for (_, registro, _) in registros])
+        if not df.empty:
+            df["Tipo"] = [rotulo_tipo(aba) for (aba, _, _) in registros]
+        return df
+
+    def _perguntas(self, where="", parametros=()):
+        # Perguntas presentes nas respostas filtradas, na ordem em que apareceram
+        cur = self._conexao().execute(
+            f"SELECT notas.pergunta FROM respostas JOIN notas ON notas.resposta = respostas.id{where} "
+            "GROUP BY notas.pergunta ORDER BY MIN(respostas.id), MIN(notas.ordem)",
+            parametros,
+        )
+        return [r[0] for r in cur.fetchall()]
+
+    def linhas_respostas(self, filtros=None, tamanho_bloco=TAMANHO_BLOCO):
+        where, parametros = self._filtro(filtros)
+        perguntas = self._perguntas(where, parametros)
+        colunas = COLUNAS_FIXAS + perguntas + [q + SUFIXO_PONDERADA for q in perguntas] + ["Tipo"]
+
+        def linhas():
+            for aba, registro, _ in self._registros(where, parametros, tamanho_bloco):
+                yield (
+                    [registro[c] for c in COLUNAS_FIXAS]
+                    + [registro["notas"].get(q) for q in perguntas]
+                    + [registro["ponderadas"].get(q) for q in perguntas]
+                    + [rotulo_tipo(aba)]
+                )
+
+        return colunas, linhas()
+
+    def linhas_scorecard(self):
+        # Uma linha por (categoria, fornecedor): média ponderada de cada pergunta por tipo,
+        # total médio por tipo (agregados) e nota final (ranking)
+        con = self._conexao()
+        versao = self._versao_questionario(con)
+        ordem = {t.capitalize(): i for i, t in enumerate(TIPOS_AVALIACAO)}
+        perguntas = con.execute(
+            "SELECT respostas.aba, notas.pergunta FROM respostas JOIN notas ON notas.resposta = respostas.id "
+            "JOIN pesos ON pesos.versao = ? AND pesos.aba = respostas.aba AND pesos.pergunta = notas.pergunta "
+            "GROUP BY respostas.aba, notas.pergunta ORDER BY MIN(respostas.id), MIN(notas.ordem)",
+            (versao,),
+        ).fetchall()
+        perguntas.sort(key=lambda par: ordem.get(par[0], len(ordem)))
+        abas = list(dict.fromkeys(aba for (aba, _) in perguntas))
+        totais = {
+            (categoria, fornecedor, aba): (qtd, soma)
+            for (aba, categoria, fornecedor, qtd, soma) in con.execute(
+                "SELECT aba, categoria, fornecedor, qtd, soma FROM agregados WHERE qtd > 0"
+            )
+        }
+        notas_finais = {
+            (categoria, fornecedor): nota
+            for (categoria, fornecedor, nota) in con.execute("SELECT categoria, fornecedor, nota FROM ranking")
+        }
+        colunas = (
+            ["Categoria", "Fornecedor"]
+            + [f"{rotulo_tipo(aba)} - {q}" for (aba, q) in perguntas]
+            + [f"Total Av {rotulo_tipo(aba)}" for aba in abas]
+            + ["Qtd. Avaliações", "Nota Final (%)"]
+        )
+
+        def montar(categoria, fornecedor, medias):
+            linha = [categoria, fornecedor] + [medias.get(par) for par in perguntas]
+            qtd_total = 0
+            for aba in abas:
+                qtd, soma = totais.get((categoria, fornecedor, aba), (0, 0.0))
+                linha.append(soma / qtd if qtd else None)
+                qtd_total += qtd
+            nota = notas_finais.get((categoria, fornecedor))
+            return linha + [qtd_total, None if nota is None else round(nota * 100, 2)]
+
+        def linhas():
+            cur = self._conexao().execute(
+                "SELECT respostas.categoria, respostas.fornecedor, respostas.aba, notas.pergunta, "
+                "AVG(notas.nota * pesos.peso) FROM respostas JOIN notas ON notas.resposta = respostas.id "
+                "JOIN pesos ON pesos.versao = ? AND pesos.aba = respostas.aba AND pesos.pergunta = notas.pergunta "
+                "GROUP BY respostas.categoria, respostas.fornecedor, respostas.aba, notas.pergunta "
+                "ORDER BY respostas.categoria, respostas.fornecedor",
+                (versao,),
+            )
+            atual = None
+            medias = {}
+            for (categoria, fornecedor, aba, pergunta, media) in cur:
+                if (categoria, fornecedor) != atual:
+                    if atual is not None:
+                        yield montar(*atual, medias)
+                    atual = (categoria, fornecedor)
+                    medias = {}
+                medias[(aba, pergunta)] = media
+            if atual is not None:
+                yield montar(*atual, medias)
+
+        return colunas, linhas()
+
+    def abas(self):
+        cur = self._conexao().execute("SELECT aba FROM respostas GROUP BY aba ORDER BY MIN(id)")
+        return [r[0] for r in cur.fetchall()]
+
+    def carregar(self, aba):
+        return registros_para_df([registro for (_, registro, _) in self._registros(" WHERE respostas.aba = ?", [aba])])
+
+    def respostas_do_avaliador(self, email):
+        # Projeção por avaliador (idx_respostas_email): custo proporcional aos próprios envios,
+        # com o total ponderado já mantido em respostas.total
+        return [
+            _resposta_avaliador(aba, registro["Categoria"], registro["Fornecedor"], total, registro["ponderadas"])
+            for (aba, registro, total) in self._registros(" WHERE respostas.email_chave = ?", [chave_email(email)])
+        ]
+
+
+# ======================================
+# Toda transação de escrita (envios, coordenador, importação, questionário,
+# ranking, migração) passa pelo mesmo flock num arquivo ao lado do banco:
+# é o único ponto de coordenação entre sessões, processos e réplicas.
+# Espera no máximo PRAZO_TRAVA_S e então desiste com TimeoutError.
+# ======================================
+PRAZO_TRAVA_S = 30
+INTERVALO_TRAVA_S = 0.005
+
+
+class TravaArquivo:
+    def __init__(self, path, prazo_s=PRAZO_TRAVA_S):
+        self.path = path
+        self.prazo = prazo_s
+
+    def adquirir(self):
+        # Um descritor por aquisição: o flock vale por descritor, então duas
+        # threads do mesmo processo também se excluem
+        if fcntl is None:
+            return None
+        arquivo = open(self.path, "a+")
+        limite = time.monotonic() + self.prazo
+        while True:
+            try:
+                fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return arquivo
+            except BlockingIOError:
+                if time.monotonic() >= limite:
+                    arquivo.close()
+                    raise TimeoutError("O armazenamento está ocupado por outra gravação. Tente novamente em alguns segundos.")
+                time.sleep(INTERVALO_TRAVA_S)
+
+    def liberar(self, arquivo):
+        if arquivo is not None:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+            arquivo.close()
+
+
+class _Transacao:
+    # Trava de arquivo + BEGIN IMMEDIATE: pega o lock de escrita logo no início,
+    # serializando envios simultâneos (entre sessões e entre processos)
+    def __init__(self, con, trava):
+        self.con = con
+        self.trava = trava
+        self._arquivo = None
+
+    def __enter__(self):
+        self._arquivo = self.trava.adquirir()
+        try:
+            self.con.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.trava.liberar(self._arquivo)
+            raise
+        return self.con
+
+    def __exit__(self, tipo_exc, exc, tb):
+        try:
+            if tipo_exc is None:
+                self.con.execute("COMMIT")
+            else:
+                self.con.execute("ROLLBACK")
+        finally:
+            self.trava.liberar(self._arquivo)
+            self._arquivo = None
+        return False
+
+
+BACKENDS = {
+    ".db": ArmazenamentoSQLite,
+    ".sqlite": ArmazenamentoSQLite,
+    ".sqlite3": ArmazenamentoSQLite,
+}
+
+_instancias = {}
+_lock_instancias = threading.Lock()
+
+
+def criar_armazenamento(destino, legado=None):
+    # Uma instância por arquivo e por processo (compartilhada entre as sessões do Streamlit)
+    chave = os.path.abspath(destino)
+    with _lock_instancias:
+        if chave not in _instancias:
+            extensao = os.path.splitext(destino)[1].lower()
+            if extensao not in BACKENDS:
+                raise ValueError(f"Backend de armazenamento desconhecido para '{destino}'")
+            _instancias[chave] = BACKENDS[extensao](destino, legado=legado)
+        return _instancias[chave]
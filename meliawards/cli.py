@@ -0,0 +1,175 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from .armazenamento import criar_armazenamento
+from .exportacao import escrever_csv, escrever_xlsx
+from .pontuacao import ler_perguntas
+from .ranking import configuracao_ranking
+from .respostas import importar_respostas
+
+# ======================================
+# Linha de comando (sem Streamlit):
+#   python -m meliawards importar respostas_legado.csv
+#   python -m meliawards recalcular
+#   python -m meliawards reponderar
+#   python -m meliawards questionario --versao 2
+#   python -m meliawards exportar-csv todas_avaliacoes.csv
+# Os pesos vêm só do Perguntas.xlsx lido pelo app: os caminhos padrão são as
+# mesmas variáveis de ambiente do appMeliAwards.py
+# ======================================
+BANCO_PADRAO = os.environ.get("MELIAWARDS_BANCO", "Respostas.db")
+LEGADO_PADRAO = os.environ.get("MELIAWARDS_RESPOSTAS", "Respostas.xlsx")
+PERGUNTAS_PADRAO = os.environ.get("MELIAWARDS_PERGUNTAS", "Perguntas.xlsx")
+
+
+def ler_arquivo_respostas(path, tipo=None):
+    extensao = os.path.splitext(path)[1].lower()
+    if extensao in (".jsonl", ".ndjson"):
+        df = pd.read_json(path, lines=True, dtype=False)
+    elif extensao == ".csv":
+        # sep=None detecta "," ou ";" (planilhas exportadas em pt-BR)
+        df = pd.read_csv(path, sep=None, engine="python", dtype={"E-mail": str, "Data": str, "Hora": str})
+    elif extensao in (".xlsx", ".xlsm"):
+        # Formato antigo do Respostas.xlsx: uma aba por tipo de avaliação
+        abas = pd.read_excel(path, sheet_name=None)
+        frames = []
+        for aba, df_aba in abas.items():
+            if "E-mail" not in df_aba.columns:
+                continue
+            if "Tipo" not in df_aba.columns:
+                df_aba["Tipo"] = aba
+            frames.append(df_aba)
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    else:
+        raise ValueError(f"Formato não suportado: {path} (use .csv, .jsonl ou .xlsx)")
+    if tipo:
+        df["Tipo"] = tipo
+    return df
+
+
+def comando_importar(args, armazenamento):
+    perguntas_ref = ler_perguntas(args.perguntas)
+    df = ler_arquivo_respostas(args.arquivo, args.tipo)
+    resumo = importar_respostas(armazenamento, df, perguntas_ref, substituir=args.substituir, estrito=args.estrito)
+    print(f"Linhas lidas: {resumo['lidas']}")
+    print(f"Importadas: {resumo['importadas']}")
+    print(f"Ignoradas (já respondidas): {resumo['ignoradas']}")
+    if resumo["invalidas"]:
+        print(f"Inválidas: {len(resumo['invalidas'])}")
+        for linha, motivo in resumo["invalidas"][:20]:
+            # +2: cabeçalho e numeração a partir de 1, como no editor de planilhas
+            print(f"  linha {linha + 2}: {motivo}")
+        if args.estrito:
+            print("Nada foi gravado (--estrito).")
+            return 1
+    return 0
+
+
+def configurar_ranking(armazenamento):
+    # Mesma configuração que o app registra a cada execução; sem ela a tabela
+    # de ranking fica vazia num banco que o app ainda não abriu
+    armazenamento.configurar_ranking(configuracao_ranking(ler_perguntas(PERGUNTAS_PADRAO)))
+
+
+def comando_recalcular(args, armazenamento):
+    configurar_ranking(armazenamento)
+    armazenamento.reconstruir_agregados()
+    print("Agregados e ranking reconstruídos.")
+    return 0
+
+
+def comando_reponderar(args, armazenamento):
+    versao = armazenamento.registrar_questionario(ler_perguntas(PERGUNTAS_PADRAO), origem=os.path.basename(PERGUNTAS_PADRAO))
+    configurar_ranking(armazenamento)
+    print(f"Questionário ativo: versão {versao}. Totais, agregados e ranking recalculados com os pesos atuais.")
+    return 0
+
+
+def comando_questionario(args, armazenamento):
+    versoes = armazenamento.versoes_questionario()
+    if versoes.empty:
+        print("Nenhum questionário registrado.")
+        return 0
+    print(versoes.to_string(index=False))
+    versao = args.versao or int(versoes["Versão"].iloc[-1])
+    pesos = armazenamento.questionario(versao)
+    if pesos.empty:
+        raise ValueError(f"Versão {versao} do questionário não existe")
+    print(f"\nPesos da versão {versao}:")
+    print(pesos.to_string(index=False))
+    return 0
+
+
+def comando_exportar_csv(args, armazenamento):
+    colunas, linhas = armazenamento.linhas_respostas()
+    with open(args.destino, "wb") as f:
+        escrever_csv(f, colunas, linhas)
+    return 0
+
+
+def comando_exportar_scorecard(args, armazenamento):
+    configurar_ranking(armazenamento)
+    colunas, linhas = armazenamento.linhas_scorecard()
+    escrever_xlsx(args.destino, "Notas Ponderadas + Média", colunas, linhas)
+    return 0
+
+
+def comando_exportar_excel(args, armazenamento):
+    armazenamento.exportar_excel(args.destino, legado=args.legado)
+    return 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="meliawards", description="Ferramentas do Scorecard de Fornecedores")
+    parser.add_argument("--banco", default=BANCO_PADRAO, help="Arquivo do armazenamento de respostas")
+    parser.add_argument("--legado", default=LEGADO_PADRAO,
+                        help="Respostas.xlsx importado quando o banco ainda não existe")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    importar = sub.add_parser("importar", help="Importa respostas de CSV/JSONL/XLSX em lote")
+    importar.add_argument("arquivo")
+    importar.add_argument("--perguntas", default=PERGUNTAS_PADRAO,
+                          help="Perguntas usadas para ler as colunas do arquivo (os pesos gravados são os do app)")
+    importar.add_argument("--tipo", help="Tipo de avaliação de todas as linhas (se o arquivo não tiver a coluna Tipo)")
+    importar.add_argument("--substituir", action="store_true", help="Sobrescreve avaliações já registradas")
+    importar.add_argument("--estrito", action="store_true", help="Não grava nada se houver linhas inválidas")
+    importar.set_defaults(funcao=comando_importar)
+
+    recalcular = sub.add_parser("recalcular", help="Reconstrói agregados e ranking a partir das respostas")
+    recalcular.set_defaults(funcao=comando_recalcular)
+
+    reponderar = sub.add_parser(
+        "reponderar", help="Reaplica os pesos do Perguntas.xlsx do app (MELIAWARDS_PERGUNTAS) a todo o histórico"
+    )
+    reponderar.set_defaults(funcao=comando_reponderar)
+
+    questionario = sub.add_parser("questionario", help="Lista as versões do questionário e os pesos de uma delas")
+    questionario.add_argument("--versao", type=int, help="Versão a detalhar (padrão: a ativa)")
+    questionario.set_defaults(funcao=comando_questionario)
+
+    for nome, funcao, ajuda in (
+        ("exportar-csv", comando_exportar_csv, "Exporta todas as avaliações em CSV"),
+        ("exportar-scorecard", comando_exportar_scorecard, "Exporta o Scorecard consolidado (XLSX)"),
+        ("exportar-excel", comando_exportar_excel, "Exporta o Respostas.xlsx (uma aba por tipo)"),
+    ):
+        exportar = sub.add_parser(nome, help=ajuda)
+        exportar.add_argument("destino")
+        exportar.set_defaults(funcao=funcao)
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    try:
+        armazenamento = criar_armazenamento(args.banco, legado=args.legado)
+        return args.funcao(args, armazenamento)
+    except (ValueError, OSError) as erro:
+        print(f"Erro: {erro}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
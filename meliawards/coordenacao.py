@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+
+# ======================================
+# Coordenador de gravações: as sessões enfileiram os envios (fila limitada) e
+# uma única thread por processo grava o que chegou dentro da janela num só
+# commit. Entre processos/réplicas, o commit passa pela trava de arquivo do
+# armazenamento (a mesma de todas as outras escritas).
+# Cada sessão só recebe a confirmação depois que o seu envio foi persistido,
+# ou um TimeoutError se não for confirmado em ESPERA_ENVIO_S.
+# ======================================
+JANELA_MS = 10
+CAPACIDADE = 1000
+MAX_LOTE = 200
+ESPERA_FILA_S = 5
+ESPERA_ENVIO_S = 60
+
+
+class _Pedido:
+    def __init__(self, aba, registros, substituir):
+        self.aba = aba
+        self.registros = registros
+        self.substituir = substituir
+        self.resultado = None
+        self.erro = None
+        self.concluido = threading.Event()
+
+
+class CoordenadorEscrita:
+    # Mesma interface de gravação do armazenamento (salvar / salvar_lote), para
+    # ser passado no lugar dele às funções de meliawards.respostas
+    def __init__(self, armazenamento, janela_ms=JANELA_MS, capacidade=CAPACIDADE, max_lote=MAX_LOTE,
+                 espera_fila_s=ESPERA_FILA_S, espera_envio_s=ESPERA_ENVIO_S, duravel=True):
+        self.armazenamento = armazenamento
+        self.janela = janela_ms / 1000
+        self.max_lote = max_lote
+        self.espera_fila = espera_fila_s
+        self.espera_envio = espera_envio_s
+        self.duravel = duravel
+        self.fila = queue.Queue(maxsize=capacidade)
+        self._lock = threading.Lock()
+        self._estatisticas = {"envios": 0, "commits": 0, "maior_lote": 0, "erros": 0}
+        self._thread = threading.Thread(target=self._executar, name="coordenador-escrita", daemon=True)
+        self._thread.start()
+
+    def salvar_lote(self, aba, registros, substituir=False):
+        pedido = _Pedido(aba, list(registros), substituir)
+        try:
+            self.fila.put(pedido, timeout=self.espera_fila)
+        except queue.Full:
+            raise TimeoutError("Muitos envios simultâneos. Tente enviar novamente em alguns segundos.")
+        if not pedido.concluido.wait(self.espera_envio):
+            raise TimeoutError(
+                "A gravação está demorando mais que o normal e o envio não foi confirmado. "
+                "Confira a Prévia das Notas antes de enviar novamente."
+            )
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido.resultado
+
+    def salvar(self, aba, registro):
+        self.salvar_lote(aba, [registro], substituir=True)
+
+    def estatisticas(self):
+        with self._lock:
+            return dict(self._estatisticas, fila=self.fila.qsize())
+
+    def _proximo_lote(self):
+        lote = [self.fila.get()]
+        limite = time.monotonic() + self.janela
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            try:
+                lote.append(self.fila.get(timeout=restante) if restante > 0 else self.fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _executar(self):
+        while True:
+            lote = self._proximo_lote()
+            try:
+                resultados = self.armazenamento.gravar_lotes(
+                    [(p.aba, p.registros, p.substituir) for p in lote], duravel=self.duravel
+                )
+            except Exception as erro:
+                resultados = [erro] * len(lote)
+            with self._lock:
+                self._estatisticas["envios"] += len(lote)
+                self._estatisticas["commits"] += 1
+                self._estatisticas["maior_lote"] = max(self._estatisticas["maior_lote"], len(lote))
+                self._estatisticas["erros"] += sum(isinstance(r, Exception) for r in resultados)
+            for pedido, resultado in zip(lote, resultados):
+                if isinstance(resultado, Exception):
+                    pedido.erro = resultado
+                else:
+                    pedido.resultado = resultado
+                pedido.concluido.set()
+
+
+_coordenadores = {}
+_lock_coordenadores = threading.Lock()
+
+
+def criar_coordenador(armazenamento, **opcoes):
+    # Um coordenador (e uma thread de gravação) por armazenamento e por processo
+    with _lock_coordenadores:
+        if id(armazenamento) not in _coordenadores:
+            _coordenadores[id(armazenamento)] = CoordenadorEscrita(armazenamento, **opcoes)
+        return _coordenadores[id(armazenamento)]
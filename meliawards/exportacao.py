@@ -0,0 +1,42 @@
+import csv
+import io
+
+from openpyxl import Workbook
+
+# ======================================
+# Exportações em blocos: as linhas chegam de um gerador (cursor do banco)
+# e nunca são montadas inteiras em memória
+# ======================================
+TAMANHO_BLOCO = 1000
+
+
+def gerar_csv(colunas, linhas, tamanho_bloco=TAMANHO_BLOCO):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow(colunas)
+    pendentes = 0
+    for linha in linhas:
+        escritor.writerow(linha)
+        pendentes += 1
+        if pendentes >= tamanho_bloco:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pendentes = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def escrever_csv(destino, colunas, linhas, tamanho_bloco=TAMANHO_BLOCO):
+    for bloco in gerar_csv(colunas, linhas, tamanho_bloco):
+        destino.write(bloco)
+
+
+def escrever_xlsx(destino, aba, colunas, linhas):
+    # write_only: o openpyxl grava as linhas em disco à medida que chegam
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(aba)
+    ws.append(colunas)
+    for linha in linhas:
+        ws.append(linha)
+    wb.save(destino)
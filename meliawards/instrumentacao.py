@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# ======================================
+# Tempo de cada fase por execução do script (rerun do Streamlit), agrupado
+# por página. Mantém as últimas JANELA amostras de cada (página, fase) para
+# todas as sessões do processo e calcula percentis sob demanda.
+# ======================================
+JANELA = 1000
+PERCENTIS = (50, 95, 99)
+
+_amostras = {}
+_lock = threading.Lock()
+
+
+def registrar(pagina, fase, duracao_ms):
+    with _lock:
+        _amostras.setdefault((pagina, fase), deque(maxlen=JANELA)).append(duracao_ms)
+
+
+class ExecucaoMedida:
+    # fragmento=True: reexecução só de um st.fragment; False: execução completa do script
+    def __init__(self, pagina, fragmento=False):
+        self.pagina = pagina
+        self.fragmento = fragmento
+        self.fases = {}
+        self.inicio = time.perf_counter()
+        self.fim = self.inicio
+        self.finalizada = False
+
+    @contextmanager
+    def medir(self, fase):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fim = time.perf_counter()
+            self.fases[fase] = self.fases.get(fase, 0.0) + (self.fim - inicio) * 1000
+
+    def finalizar(self, completa=True):
+        # completa=False: a execução foi interrompida (st.stop/st.rerun) e só
+        # conta até o fim da última fase medida
+        if self.finalizada:
+            return
+        self.finalizada = True
+        fim = time.perf_counter() if completa else self.fim
+        total = (fim - self.inicio) * 1000
+        for fase, duracao in self.fases.items():
+            registrar(self.pagina, fase, duracao)
+        registrar(self.pagina, "render", max(0.0, total - sum(self.fases.values())))
+        registrar(self.pagina, "total", total)
+
+
+def iniciar_execucao(pagina, anterior=None, fragmento=False):
+    if anterior is not None:
+        anterior.finalizar(completa=False)
+    return ExecucaoMedida(pagina, fragmento)
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return None
+    posicao = (len(ordenados) - 1) * p / 100
+    baixo = int(posicao)
+    alto = min(baixo + 1, len(ordenados) - 1)
+    return ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * (posicao - baixo)
+
+
+def resumo_desempenho():
+    with _lock:
+        copia = {chave: sorted(valores) for chave, valores in _amostras.items()}
+    linhas = []
+    for (pagina, fase), valores in sorted(copia.items()):
+        linha = {"Página": pagina, "Fase": fase, "Amostras": len(valores)}
+        for p in PERCENTIS:
+            linha[f"p{p} (ms)"] = round(_percentil(valores, p), 3)
+        linha["Máx. (ms)"] = round(valores[-1], 3)
+        linhas.append(linha)
+    return linhas
+
+
+def exportar_desempenho_json():
+    paginas = {}
+    for linha in resumo_desempenho():
+        paginas.setdefault(linha["Página"], {})[linha["Fase"]] = {
+            "amostras": linha["Amostras"],
+            **{f"p{p}_ms": linha[f"p{p} (ms)"] for p in PERCENTIS},
+            "max_ms": linha["Máx. (ms)"],
+        }
+    return json.dumps(
+        {"gerado_em": datetime.now().isoformat(timespec="seconds"), "janela": JANELA, "paginas": paginas},
+        ensure_ascii=False, indent=2,
+    )
+
+
+def limpar_desempenho():
+    with _lock:
+        _amostras.clear()
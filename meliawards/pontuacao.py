@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+NOTA_MINIMA = 1
+NOTA_MAXIMA = 3
+TIPOS_AVALIACAO = ["Comercial", "Técnica", "ESG"]
+ROTULO_TIPO = {t.capitalize(): t for t in TIPOS_AVALIACAO}   # aba gravada -> tipo
+
+
+def rotulo_tipo(aba):
+    return ROTULO_TIPO.get(aba, aba)
+
+
+def ler_perguntas(path):
+    df = pd.read_excel(path, header=0)
+    perguntas = {}
+    tipos_avaliacao = {'Comercial': [], 'Técnica': [], 'ESG': []}
+    for tipo in tipos_avaliacao.keys():
+        cols_questao = [c for c in df.columns if tipo.lower() in str(c).lower() and "peso" not in str(c).lower()]
+        cols_peso = [c for c in df.columns if tipo.lower() in str(c).lower() and "peso" in str(c).lower()]
+        cols_questao.sort(); cols_peso.sort()
+        for col_q, col_p in zip(cols_questao, cols_peso):
+            for idx in range(len(df)):
+                q = df.at[idx, col_q]
+                p = df.at[idx, col_p]
+                if pd.notnull(q) and pd.notnull(p) and str(q).strip() != "":
+                    tipos_avaliacao[tipo].append((str(q).strip(), float(p)))
+        perguntas[tipo] = tipos_avaliacao[tipo]
+    return perguntas
+
+
+def perguntas_do_tipo(perguntas_ref, tipo):
+    # Aceita o tipo como no Acessos.xlsx ("ESG") ou como nome da aba ("Esg")
+    return perguntas_ref.get(str(tipo).capitalize()) or perguntas_ref.get(tipo) \
+        or perguntas_ref.get(rotulo_tipo(str(tipo).capitalize()))
+
+
+# ======================================
+# Ponderação vetorizada de um lote de avaliações
+# matriz_notas: uma linha por fornecedor, uma coluna por pergunta
+# ======================================
+def _matriz(matriz_notas):
+    try:
+        return np.asarray(matriz_notas, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("Todas as notas devem ser numéricas.")
+
+
+def validar_lote(matriz_notas):
+    # Máscara das linhas com todas as notas preenchidas, inteiras e dentro da escala
+    notas = _matriz(matriz_notas)
+    with np.errstate(invalid="ignore"):
+        ok = (notas >= NOTA_MINIMA) & (notas <= NOTA_MAXIMA) & (notas == np.round(notas))
+    return ok.all(axis=1)
+
+
+def ponderar_lote(matriz_notas, pesos):
+    pesos = np.asarray(pesos, dtype=float)
+    notas = _matriz(matriz_notas)
+    if notas.ndim != 2 or notas.shape[1] != len(pesos):
+        raise ValueError("A grade de notas não corresponde às perguntas do questionário.")
+    if np.isnan(notas).any():
+        raise ValueError("Preencha todas as notas antes de enviar.")
+    if not validar_lote(notas).all():
+        raise ValueError(f"As notas devem ser números inteiros de {NOTA_MINIMA} a {NOTA_MAXIMA}.")
+    notas = notas.astype(int)
+    return notas, notas * pesos
@@ -0,0 +1,39 @@
+from .pontuacao import NOTA_MAXIMA
+
+# ======================================
+# Ranking da premiação: combina Comercial, Técnica e ESG por fornecedor
+# dentro de cada categoria. Cada tipo é normalizado pela nota máxima possível
+# do seu questionário (3 x soma dos pesos) e entra com o peso configurado.
+# Tipos sem avaliação para o fornecedor ficam fora da média (renormaliza).
+# O peso de cada questionário no ranking final fica só aqui: o app e a CLI
+# registram a mesma configuração
+# ======================================
+PESOS_TIPO_PADRAO = {"Comercial": 1.0, "Técnica": 1.0, "ESG": 1.0}
+
+
+def maximos_por_tipo(perguntas):
+    return {tipo: NOTA_MAXIMA * sum(peso for (_, peso) in lista) for tipo, lista in perguntas.items() if lista}
+
+
+def configuracao_ranking(perguntas, pesos_tipo=None):
+    # Chaves pelo nome da aba gravada (tipo.capitalize(), ex.: "Esg")
+    pesos_tipo = PESOS_TIPO_PADRAO if pesos_tipo is None else pesos_tipo
+    maximos = maximos_por_tipo(perguntas)
+    return {
+        "maximos": {tipo.capitalize(): maximo for tipo, maximo in maximos.items()},
+        "pesos": {tipo.capitalize(): float(peso) for tipo, peso in pesos_tipo.items()},
+    }
+
+
+def nota_combinada(medias, configuracao):
+    # medias: {aba: média dos totais ponderados}; retorna valor entre 0 e 1 (ou None)
+    numerador = 0.0
+    denominador = 0.0
+    for aba, media in medias.items():
+        maximo = configuracao["maximos"].get(aba)
+        peso = configuracao["pesos"].get(aba, 0.0)
+        if not maximo or not peso:
+            continue
+        numerador += peso * media / maximo
+        denominador += peso
+    return numerador / denominador if denominador else None
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import pickle
+import threading
+
+# ======================================
+# Cache das planilhas de referência (Perguntas.xlsx / Acessos.xlsx)
+# Compartilhado por todas as sessões do processo e válido enquanto o arquivo
+# de origem não mudar (mtime/tamanho e, se esses mudarem, o hash do conteúdo).
+# Opcionalmente grava um sidecar binário (pickle) para partida a frio rápida.
+# ======================================
+VERSAO_SIDECAR = 1
+
+_cache = {}
+_sidecars = set()
+_lock = threading.Lock()
+
+
+def assinatura_arquivo(path):
+    info = os.stat(path)
+    return (info.st_mtime_ns, info.st_size)
+
+
+def hash_arquivo(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def caminho_sidecar(path, nome):
+    pasta, arquivo = os.path.split(os.path.abspath(path))
+    return os.path.join(pasta, f".{arquivo}.{nome}.cache.pkl")
+
+
+def _ler_sidecar(caminho):
+    try:
+        with open(caminho, "rb") as f:
+            dados = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(dados, dict) or dados.get("versao") != VERSAO_SIDECAR:
+        return None
+    return dados
+
+
+def _gravar_sidecar(caminho, assinatura, hash_, valor):
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, "wb") as f:
+            pickle.dump(
+                {"versao": VERSAO_SIDECAR, "assinatura": assinatura, "hash": hash_, "valor": valor},
+                f, protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(temporario, caminho)
+    except OSError:
+        # Sidecar é só uma otimização: pasta somente leitura não impede o carregamento
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def carregar_referencia(path, leitor, nome=None, sidecar=True):
+    nome = nome or leitor.__name__
+    chave = (os.path.abspath(path), nome)
+    assinatura = assinatura_arquivo(path)
+    with _lock:
+        item = _cache.get(chave)
+        if item is not None and item[0] == assinatura:
+            return item[1]
+        valor = None
+        hash_ = None
+        caminho = caminho_sidecar(path, nome)
+        if sidecar:
+            _sidecars.add(caminho)
+            dados = _ler_sidecar(caminho)
+            if dados is not None:
+                if dados["assinatura"] == assinatura:
+                    valor = dados["valor"]
+                else:
+                    # mtime mudou (cópia, checkout...), mas o conteúdo pode ser o mesmo
+                    hash_ = hash_arquivo(path)
+                    if dados["hash"] == hash_:
+                        valor = dados["valor"]
+                        _gravar_sidecar(caminho, assinatura, hash_, valor)
+        if valor is None:
+            valor = leitor(path)
+            if sidecar:
+                _gravar_sidecar(caminho, assinatura, hash_ or hash_arquivo(path), valor)
+        _cache[chave] = (assinatura, valor)
+        return valor
+
+
+def invalidar_referencias(remover_sidecars=True):
+    # Acionado pelo admin: força a releitura das planilhas na próxima execução
+    with _lock:
+        _cache.clear()
+        if remover_sidecars:
+            for caminho in _sidecars:
+                if os.path.exists(caminho):
+                    os.remove(caminho)
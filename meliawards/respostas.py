@@ -0,0 +1,106 @@
+from datetime import datetime
+
+import pandas as pd
+
+from .armazenamento import montar_registro
+from .pontuacao import perguntas_do_tipo, ponderar_lote, validar_lote
+
+COLUNAS_OBRIGATORIAS = ["Tipo", "E-mail", "Categoria", "Fornecedor"]
+
+
+def carimbo(momento=None):
+    momento = momento or datetime.now()
+    return momento.strftime("%d/%m/%Y"), momento.strftime("%H:%M:%S")
+
+
+def obter_respostas_avaliador(armazenamento, email):
+    # [{Aba, Categoria, Fornecedor, Total, ponderadas}] só com os envios deste e-mail
+    return armazenamento.respostas_do_avaliador(email)
+
+
+def salvar_resposta_ponderada(armazenamento, tipo, email, categoria, fornecedor, respostas, perguntas):
+    data_str, hora_str = carimbo()
+    aba = tipo.capitalize()
+    notas_puras = {}
+    notas_ponderadas = {}
+    for (pergunta, peso) in perguntas:
+        nota = respostas[pergunta]
+        notas_puras[pergunta] = nota
+        notas_ponderadas[pergunta] = nota * peso
+    registro = montar_registro(data_str, hora_str, email, categoria, fornecedor, notas_puras, notas_ponderadas)
+    armazenamento.salvar(aba, registro)
+    return aba
+
+
+def salvar_respostas_lote(armazenamento, tipo, email, categoria, fornecedores, matriz_notas, perguntas):
+    # Uma linha por fornecedor, uma coluna por pergunta; validação e ponderação vetorizadas
+    notas, ponderadas = ponderar_lote(matriz_notas, [p for (q, p) in perguntas])
+    data_str, hora_str = carimbo()
+    aba = tipo.capitalize()
+    questoes = [q for (q, p) in perguntas]
+    registros = [
+        montar_registro(data_str, hora_str, email, categoria, fornecedor,
+                        zip(questoes, notas[i].tolist()), zip(questoes, ponderadas[i].tolist()))
+        for i, fornecedor in enumerate(fornecedores)
+    ]
+    # Uma única transação; fornecedores já respondidos são ignorados (um envio por usuário)
+    return armazenamento.salvar_lote(aba, registros)
+
+
+def _coluna_da_pergunta(colunas, idx, pergunta):
+    # Aceita o texto exato da pergunta ou a posição (Q1, Q2...), como na grade do app
+    for candidata in (pergunta, f"Q{idx}"):
+        if candidata in colunas:
+            return candidata
+    return None
+
+
+def importar_respostas(armazenamento, df, perguntas_ref, substituir=False, estrito=False):
+    # df: uma linha por avaliação com Tipo, E-mail, Categoria, Fornecedor, [Data, Hora]
+    # e a nota pura de cada pergunta. As ponderadas são sempre recalculadas.
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    df = df.reset_index(drop=True)
+    data_padrao, hora_padrao = carimbo()
+    lotes = []
+    invalidas = []
+    incompletas = df[COLUNAS_OBRIGATORIAS].isnull().any(axis=1)
+    invalidas += [(i, "campos obrigatórios vazios") for i in df.index[incompletas]]
+    df = df[~incompletas]
+    for tipo, grupo in df.groupby("Tipo", sort=False):
+        perguntas = perguntas_do_tipo(perguntas_ref, tipo)
+        if not perguntas:
+            invalidas += [(i, f"tipo desconhecido: {tipo}") for i in grupo.index]
+            continue
+        colunas = [_coluna_da_pergunta(grupo.columns, idx, q) for idx, (q, _) in enumerate(perguntas, 1)]
+        if None in colunas:
+            invalidas += [(i, f"perguntas de {tipo} ausentes no arquivo") for i in grupo.index]
+            continue
+        matriz = grupo[colunas].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        validas = validar_lote(matriz)
+        invalidas += [(i, "notas fora da escala ou vazias") for i in grupo.index[~validas]]
+        grupo = grupo[validas]
+        if grupo.empty:
+            continue
+        notas, ponderadas = ponderar_lote(matriz[validas], [p for (_, p) in perguntas])
+        questoes = [q for (q, _) in perguntas]
+        datas = grupo["Data"].fillna(data_padrao).astype(str).tolist() if "Data" in grupo else [data_padrao] * len(grupo)
+        horas = grupo["Hora"].fillna(hora_padrao).astype(str).tolist() if "Hora" in grupo else [hora_padrao] * len(grupo)
+        registros = [
+            montar_registro(data, hora, str(email), str(categoria), str(fornecedor),
+                            zip(questoes, linha_notas), zip(questoes, linha_ponderadas))
+            for data, hora, email, categoria, fornecedor, linha_notas, linha_ponderadas in zip(
+                datas, horas, grupo["E-mail"].tolist(), grupo["Categoria"].tolist(),
+                grupo["Fornecedor"].tolist(), notas.tolist(), ponderadas.tolist(),
+            )
+        ]
+        lotes.append((str(tipo).capitalize(), registros))
+    resumo = {"lidas": len(incompletas), "importadas": 0, "ignoradas": 0, "invalidas": sorted(invalidas)}
+    if estrito and invalidas:
+        return resumo
+    for aba, registros in lotes:
+        salvos = armazenamento.salvar_lote(aba, registros, substituir=substituir)
+        resumo["importadas"] += len(salvos)
+        resumo["ignoradas"] += len(registros) - len(salvos)
+    return resumo